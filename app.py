@@ -3,20 +3,43 @@ import numpy as np
 from PIL import Image
 import os
 from werkzeug.utils import secure_filename
-from collections import Counter
 import tempfile
-import matplotlib.pyplot as plt
-import matplotlib
 import base64
 from io import BytesIO
 import uuid
+import json
+import mimetypes
+import time
 
-# Configurar matplotlib para no usar GUI
-matplotlib.use('Agg')
+from point_operations import OPERATIONS, apply_point_operations, compute_histogram, histogram_statistics
+from spatial_filters import EDGE_DETECTORS, FILTERS, apply_filter
+from preview_pipeline import PreviewCache
+from video_analysis import CHANNEL_NAMES, VIDEO_EXTENSIONS, analyze_video, get_video_metadata
+from instrumentation import init_instrumentation, timed
+from inference_service import DEFAULT_SERVICE_URL, InferenceClient, InferenceServiceError
 
 app = Flask(__name__)
 app.secret_key = 'tu-clave-secreta-aqui'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB por defecto
+
+# Perfilado de peticiones lentas: umbral en ms (0 = desactivado)
+app.config['SLOW_REQUEST_PROFILE_MS'] = float(os.environ.get('SLOW_REQUEST_PROFILE_MS', 0))
+app.config['PROFILE_FOLDER'] = os.environ.get('PROFILE_FOLDER', 'profiles')
+# Directorio compartido para exponer en /metrics las métricas de todos los workers
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR') or None
+
+# Servicio local de inferencia YOLOv8 (ver inference_service.py)
+app.config['INFERENCE_SERVICE_URL'] = os.environ.get('INFERENCE_SERVICE_URL', DEFAULT_SERVICE_URL)
+
+# Memoria máxima de la caché de vista previa por proceso
+app.config['PREVIEW_CACHE_MB'] = int(os.environ.get('PREVIEW_CACHE_MB', 256))
+
+# Tamaño máximo de imagen en megapíxeles: acota la memoria que usa una petición
+# (ver "Modo Producción" en el README y gunicorn.conf.py)
+app.config['MAX_IMAGE_MEGAPIXELS'] = float(os.environ.get('MAX_IMAGE_MEGAPIXELS', 12))
+
+# Server-Timing, /metrics y perfilador opcional
+init_instrumentation(app)
 
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff'}
@@ -30,6 +53,38 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def upload_content_type(file):
+    """
+    Content type con el que se reenvía una imagen subida al servicio de inferencia.
+
+    Usa el declarado por el navegador; si no es de imagen (por ejemplo
+    application/octet-stream, que el servicio interpreta como frame crudo),
+    lo deduce de la extensión del archivo.
+    """
+    if file.mimetype and file.mimetype.startswith('image/'):
+        return file.mimetype
+    return mimetypes.guess_type(file.filename)[0] or 'image/jpeg'
+
+def allowed_video(filename):
+    """Verifica si el archivo es un video con una extensión soportada"""
+    return '.' in filename and \
+           filename.rsplit('.', 1)[1].lower() in VIDEO_EXTENSIONS
+
+def check_image_size(img):
+    """
+    Rechaza imágenes con más píxeles que MAX_IMAGE_MEGAPIXELS.
+    
+    Sólo lee el encabezado (`Image.open` no decodifica la imagen).
+    
+    Args:
+        img: Imagen PIL abierta
+    """
+    width, height = img.size
+    max_megapixels = app.config['MAX_IMAGE_MEGAPIXELS']
+    if width * height > max_megapixels * 1_000_000:
+        raise ValueError(f"La imagen tiene {width} × {height} píxeles; "
+                         f"el máximo permitido es {max_megapixels:g} megapíxeles")
+
 def get_image_metadata(image_path):
     """
     Extrae metadatos básicos de la imagen.
@@ -41,6 +96,8 @@ def get_image_metadata(image_path):
     y no conservan información técnica detallada de sensores remotos.
     """
     with Image.open(image_path) as img:
+        check_image_size(img)
+        
         # Obtener tamaño del archivo en disco
         file_size = os.path.getsize(image_path)
         
@@ -87,6 +144,19 @@ def get_image_metadata(image_path):
         
         return metadata
 
+def _figure_class():
+    """
+    Importa matplotlib de forma perezosa (es la dependencia más pesada).
+    
+    Sólo se carga al generar el primer histograma; en producción se carga
+    en el proceso padre antes del fork (ver `warm_up`).
+    """
+    import matplotlib
+    # Configurar matplotlib para no usar GUI
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    return Figure
+
 def generate_histogram_image(histogram, color, channel_name):
     """
     Genera una imagen del histograma usando matplotlib.
@@ -99,8 +169,10 @@ def generate_histogram_image(histogram, color, channel_name):
     Returns:
         str: Imagen en formato base64 para mostrar en HTML
     """
-    plt.style.use('default')
-    fig, ax = plt.subplots(figsize=(10, 4), dpi=80)
+    # Se usa Figure directamente (sin pyplot) para que sea seguro generar
+    # histogramas desde varios hilos a la vez
+    fig = _figure_class()(figsize=(10, 4), dpi=80)
+    ax = fig.subplots()
     
     # Crear el histograma
     x_values = range(256)
@@ -121,61 +193,72 @@ def generate_histogram_image(histogram, color, channel_name):
     ax.tick_params(labelsize=9)
     
     # Ajustar layout
-    plt.tight_layout()
+    fig.tight_layout()
     
     # Convertir a base64
     buffer = BytesIO()
-    plt.savefig(buffer, format='png', bbox_inches='tight', facecolor='white', edgecolor='none')
+    fig.savefig(buffer, format='png', bbox_inches='tight', facecolor='white', edgecolor='none')
     buffer.seek(0)
     image_base64 = base64.b64encode(buffer.read()).decode('utf-8')
     buffer.close()
     
-    # Limpiar la figura
-    plt.close(fig)
-    
     return image_base64
 
-def analyze_channel_statistics(channel_array, color, channel_name):
+def analyze_histogram(histogram, color, channel_name, include_histogram_image=True):
     """
-    Calcula estadísticas para un canal específico de la imagen y genera histograma.
+    Calcula las estadísticas de un canal a partir de su histograma de 256 bins.
+    
+    Es el camino común de imágenes y videos: en un video el histograma es
+    la acumulación de los histogramas de todos los frames analizados.
     
     Args:
-        channel_array: Array numpy 2D con los valores del canal
+        histogram: Array numpy con el histograma del canal (256 posiciones)
         color: Color para el histograma (formato RGB como tuple)
         channel_name: Nombre del canal para el título
+        include_histogram_image: Si es False no se genera la imagen del histograma
         
     Returns:
         dict: Diccionario con las estadísticas del canal e imagen del histograma
     """
-    # Aplanar el array para calcular estadísticas
-    flat_channel = channel_array.flatten()
-    
-    # Calcular histograma
-    histogram, _ = np.histogram(flat_channel, bins=256, range=(0, 256))
-    
-    # Calcular estadísticas básicas
-    min_val = int(np.min(flat_channel))
-    max_val = int(np.max(flat_channel))
-    mean_val = float(np.mean(flat_channel))
-    std_val = float(np.std(flat_channel))
-    
-    # Calcular moda (valor más frecuente)
-    counter = Counter(flat_channel)
-    mode_val = int(counter.most_common(1)[0][0])
+    stats = histogram_statistics(histogram)
     
     # Generar imagen del histograma
-    histogram_image = generate_histogram_image(histogram, color, channel_name)
+    histogram_image = None
+    if include_histogram_image:
+        with timed(f"histograma_{channel_name.lower()}"):
+            histogram_image = generate_histogram_image(histogram, color, channel_name)
     
     return {
         'histograma': histogram.tolist(),
         'histograma_imagen': histogram_image,
-        'minimo': min_val,
-        'maximo': max_val,
-        'promedio': round(mean_val, 2),
-        'desviacion_estandar': round(std_val, 2),
-        'moda': mode_val
+        'minimo': int(stats['minimo']),
+        'maximo': int(stats['maximo']),
+        'promedio': round(float(stats['promedio']), 2),
+        'desviacion_estandar': round(float(np.sqrt(stats['varianza'])), 2),
+        'moda': int(stats['moda'])
     }
 
+def analyze_channel_statistics(channel_array, color, channel_name, include_histogram_image=True):
+    """
+    Calcula estadísticas para un canal específico de la imagen y genera histograma.
+    
+    Se recorre la imagen una sola vez (para el histograma); mínimo, máximo,
+    promedio, desviación estándar y moda se derivan de los 256 bins.
+    
+    Args:
+        channel_array: Array numpy 2D (uint8) con los valores del canal
+        color: Color para el histograma (formato RGB como tuple)
+        channel_name: Nombre del canal para el título
+        include_histogram_image: Si es False no se genera la imagen del
+            histograma (útil cuando sólo se necesitan los valores, por
+            ejemplo para la ecualización)
+        
+    Returns:
+        dict: Diccionario con las estadísticas del canal e imagen del histograma
+    """
+    histogram = compute_histogram(channel_array, 256)
+    return analyze_histogram(histogram, color, channel_name, include_histogram_image)
+
 def process_image(image_path):
     """
     Procesa la imagen y extrae metadatos y estadísticas por canal.
@@ -187,16 +270,18 @@ def process_image(image_path):
         dict: Diccionario con metadatos y estadísticas por canal
     """
     # Obtener metadatos
-    metadata = get_image_metadata(image_path)
+    with timed('metadatos'):
+        metadata = get_image_metadata(image_path)
     
     # Cargar imagen como array numpy
     with Image.open(image_path) as img:
-        # Convertir a RGB si no está en ese formato
-        if img.mode != 'RGB':
-            img = img.convert('RGB')
-        
-        # Convertir a array numpy
-        img_array = np.array(img)
+        with timed('decodificacion'):
+            # Convertir a RGB si no está en ese formato
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            
+            # Convertir a array numpy
+            img_array = np.array(img)
         
         # Separar canales RGB
         canal_rojo = img_array[:, :, 0]
@@ -204,9 +289,12 @@ def process_image(image_path):
         canal_azul = img_array[:, :, 2]
         
         # Analizar estadísticas por canal con colores específicos
-        estadisticas_rojo = analyze_channel_statistics(canal_rojo, (0.8, 0.2, 0.2), "Rojo")
-        estadisticas_verde = analyze_channel_statistics(canal_verde, (0.2, 0.8, 0.2), "Verde")
-        estadisticas_azul = analyze_channel_statistics(canal_azul, (0.2, 0.2, 0.8), "Azul")
+        with timed('estadisticas_rojo'):
+            estadisticas_rojo = analyze_channel_statistics(canal_rojo, (0.8, 0.2, 0.2), "Rojo")
+        with timed('estadisticas_verde'):
+            estadisticas_verde = analyze_channel_statistics(canal_verde, (0.2, 0.8, 0.2), "Verde")
+        with timed('estadisticas_azul'):
+            estadisticas_azul = analyze_channel_statistics(canal_azul, (0.2, 0.2, 0.8), "Azul")
         
         result = {
             'metadatos': metadata,
@@ -219,6 +307,194 @@ def process_image(image_path):
         
         return result
 
+CHANNEL_COLORS = {
+    'rojo': ((0.8, 0.2, 0.2), "Rojo"),
+    'verde': ((0.2, 0.8, 0.2), "Verde"),
+    'azul': ((0.2, 0.2, 0.8), "Azul")
+}
+
+def generate_time_series_image(series):
+    """
+    Genera el gráfico de la evolución temporal del promedio de cada canal.
+    
+    La banda sombreada alrededor de cada curva es ± una desviación estándar.
+    
+    Args:
+        series: Serie temporal devuelta por `TemporalStatistics.series`
+        
+    Returns:
+        str: Imagen en formato base64 para mostrar en HTML
+    """
+    fig = _figure_class()(figsize=(10, 4), dpi=80)
+    ax = fig.subplots()
+    
+    times = np.array(series['tiempo_s'])
+    for name in CHANNEL_NAMES:
+        color, label = CHANNEL_COLORS[name]
+        mean = np.array(series[name]['promedio'])
+        std = np.array(series[name]['desviacion_estandar'])
+        ax.plot(times, mean, color=color, linewidth=1.5, label=label)
+        ax.fill_between(times, mean - std, mean + std, color=color, alpha=0.15, linewidth=0)
+    
+    ax.set_ylim(0, 255)
+    ax.set_xlabel('Tiempo (s)', fontsize=10)
+    ax.set_ylabel('Promedio ± Desv. Estándar', fontsize=10)
+    ax.set_title('Evolución Temporal por Canal', fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.legend(fontsize=9)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.tick_params(labelsize=9)
+    fig.tight_layout()
+    
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', facecolor='white', edgecolor='none')
+    image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    buffer.close()
+    
+    return image_base64
+
+def process_video(video_path, frame_step=1, max_frames=None, include_images=True):
+    """
+    Procesa un video frame por frame y extrae metadatos y estadísticas por canal.
+    
+    Los frames no se conservan en memoria: se acumulan sus histogramas y
+    una serie temporal acotada (ver `video_analysis.py`). Las estadísticas
+    globales de cada canal se calculan con `analyze_histogram` sobre el
+    histograma acumulado, igual que para una imagen.
+    
+    Args:
+        video_path: Ruta al archivo de video
+        frame_step: Se analiza un frame de cada `frame_step`
+        max_frames: Cantidad máxima de frames analizados (None = todos)
+        include_images: Si es False no se generan los gráficos
+        
+    Returns:
+        dict: Metadatos, estadísticas por canal y serie temporal
+    """
+    with timed('metadatos'):
+        metadata = get_video_metadata(video_path)
+    
+    with timed('frames'):
+        statistics = analyze_video(video_path, frame_step, max_frames)
+    
+    canales = {}
+    for name, histogram in zip(CHANNEL_NAMES, statistics.histograms):
+        color, label = CHANNEL_COLORS[name]
+        with timed(f'estadisticas_{name}'):
+            canales[name] = analyze_histogram(histogram, color, label, include_images)
+    
+    series = statistics.series()
+    series_image = None
+    if include_images:
+        with timed('serie_temporal'):
+            series_image = generate_time_series_image(series)
+    
+    return {
+        'metadatos': metadata,
+        'canales': canales,
+        'video': {
+            'frames_analizados': statistics.frames_analyzed,
+            'paso_frames': frame_step,
+            'serie_temporal': series,
+            'serie_temporal_imagen': series_image
+        }
+    }
+
+def parse_frame_sampling(form):
+    """
+    Lee los parámetros de muestreo de frames de un formulario.
+    
+    Returns:
+        tuple: (paso_frames, max_frames); max_frames es None si no se indicó
+    """
+    try:
+        frame_step = int(form.get('paso_frames') or 1)
+        max_frames = int(form['max_frames']) if form.get('max_frames') else None
+    except ValueError:
+        raise ValueError('Los campos "paso_frames" y "max_frames" deben ser enteros') from None
+    if frame_step < 1:
+        raise ValueError('El campo "paso_frames" debe ser mayor o igual a 1')
+    if max_frames is not None and max_frames < 1:
+        raise ValueError('El campo "max_frames" debe ser mayor o igual a 1')
+    return frame_step, max_frames
+
+def load_image_array(image_source):
+    """
+    Carga una imagen como array numpy conservando la profundidad de bits.
+    
+    Las imágenes de 16 bits en escala de grises se mantienen como uint16,
+    las de escala de grises de 8 bits como un único canal y el resto se
+    convierte a RGB.
+    
+    Args:
+        image_source: Ruta o archivo abierto con la imagen
+        
+    Returns:
+        np.ndarray: Array 2D (un canal) o 3D (alto, ancho, 3)
+    """
+    with Image.open(image_source) as img:
+        check_image_size(img)
+        if img.mode in ('I;16', 'I;16L', 'I;16B'):
+            return np.array(img, dtype=np.uint16)
+        if img.mode == 'L':
+            return np.array(img)
+        return np.array(img.convert('RGB'))
+
+# Sesiones de vista previa interactiva. Al cargar una imagen sólo se guarda el
+# archivo original en uploads/; la pirámide se construye en el primer render,
+# en cualquier worker
+preview_cache = PreviewCache(max_bytes=app.config['PREVIEW_CACHE_MB'] * 1024 * 1024,
+                             storage_dir=UPLOAD_FOLDER, loader=load_image_array)
+
+def parse_operations(raw_operations, field='operaciones'):
+    """
+    Interpreta la cadena de operaciones recibida como JSON.
+    
+    Args:
+        raw_operations: Texto JSON con una lista de operaciones
+        field: Nombre del campo del formulario (para los mensajes de error)
+        
+    Returns:
+        list: Lista de diccionarios de operación
+    """
+    try:
+        operations = json.loads(raw_operations or '[]')
+    except json.JSONDecodeError:
+        raise ValueError(f'El campo "{field}" debe ser JSON válido') from None
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        raise ValueError(f'El campo "{field}" debe ser una lista de objetos')
+    return operations
+
+def image_array_to_png(img_array):
+    """Codifica un array numpy como PNG en memoria."""
+    buffer = BytesIO()
+    Image.fromarray(img_array).save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
+
+def warm_up():
+    """
+    Ejecuta un análisis completo sobre una imagen sintética pequeña.
+    
+    Carga matplotlib y su caché de fuentes, y recorre todo el camino de
+    `process_image`, de modo que la primera petición real no pague esos
+    costos. Se usa desde `gunicorn.conf.py` en el proceso padre (antes del
+    fork) y en cada worker antes de que reciba tráfico.
+    
+    Returns:
+        float: Duración del calentamiento en segundos
+    """
+    start = time.perf_counter()
+    gradient = np.linspace(0, 255, 64 * 48 * 3).reshape(48, 64, 3).astype(np.uint8)
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as temp_file:
+        Image.fromarray(gradient).save(temp_file, format='PNG')
+    try:
+        process_image(temp_file.name)
+    finally:
+        os.unlink(temp_file.name)
+    return time.perf_counter() - start
+
 @app.route('/')
 def index():
     """Ruta principal que muestra el formulario de carga"""
@@ -227,8 +503,9 @@ def index():
 @app.route('/upload', methods=['POST'])
 def upload_image():
     """
-    Ruta POST para procesar imágenes cargadas.
+    Ruta POST para procesar imágenes y videos cargados.
     El procesamiento es síncrono y los resultados se muestran inmediatamente.
+    Para videos se usan los campos opcionales 'paso_frames' y 'max_frames'.
     """
     if 'file' not in request.files:
         flash('No se seleccionó ningún archivo')
@@ -240,49 +517,262 @@ def upload_image():
         flash('No se seleccionó ningún archivo')
         return redirect(request.url)
     
+    if file and allowed_video(file.filename):
+        try:
+            frame_step, max_frames = parse_frame_sampling(request.form)
+            resultados = process_uploaded_video(file, frame_step, max_frames)
+            return render_template('index.html',
+                                 resultados=resultados,
+                                 archivo_procesado=file.filename)
+        except Exception as e:
+            flash(f'Error al procesar el video: {str(e)}')
+            return redirect(url_for('index'))
+    
     if file and allowed_file(file.filename):
         try:
-            # Usar archivo temporal para procesamiento
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-                file.save(temp_file.name)
-                
+            # Usar archivo temporal para procesamiento (en uploads/, para
+            # poder conservarlo sin copiarlo como original de la vista previa)
+            suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=app.config['UPLOAD_FOLDER']) as temp_file:
+                file.save(temp_file)
+            
+            try:
                 # Procesar imagen de forma síncrona
                 resultados = process_image(temp_file.name)
                 
-                # Limpiar archivo temporal
-                os.unlink(temp_file.name)
-                
-                # Renderizar template con resultados
-                return render_template('index.html', 
-                                     resultados=resultados,
-                                     archivo_procesado=file.filename)
+                # Registrar el archivo para los ajustes interactivos (sin decodificarlo)
+                preview_id = preview_cache.register(temp_file.name)
+            finally:
+                if os.path.exists(temp_file.name):
+                    os.unlink(temp_file.name)
+            
+            # Renderizar template con resultados
+            return render_template('index.html', 
+                                 resultados=resultados,
+                                 archivo_procesado=file.filename,
+                                 preview_id=preview_id)
                 
         except Exception as e:
             flash(f'Error al procesar la imagen: {str(e)}')
             return redirect(url_for('index'))
     else:
-        flash('Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF')
+        flash('Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF o video MP4, AVI, MOV, MKV, WEBM')
         return redirect(url_for('index'))
 
+def process_uploaded_video(file, frame_step=1, max_frames=None, include_images=True):
+    """Guarda el video en un archivo temporal (en disco, no en memoria) y lo procesa."""
+    suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        file.save(temp_file)
+    try:
+        return process_video(temp_file.name, frame_step, max_frames, include_images)
+    finally:
+        os.unlink(temp_file.name)
+
+@app.route('/video-stats', methods=['POST'])
+def video_stats():
+    """
+    Calcula las estadísticas temporales de un video.
+    
+    Recibe el archivo en 'file' y opcionalmente 'paso_frames' (analizar un
+    frame de cada N) y 'max_frames'. Devuelve JSON con los metadatos, las
+    estadísticas e histogramas acumulados por canal y la serie temporal.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return {'error': 'No se seleccionó ningún archivo'}, 400
+    if not allowed_video(file.filename):
+        return {'error': 'Tipo de archivo no permitido. Use: MP4, AVI, MOV, MKV, WEBM'}, 400
+    
+    try:
+        frame_step, max_frames = parse_frame_sampling(request.form)
+        resultados = process_uploaded_video(file, frame_step, max_frames, include_images=False)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': f'Error al procesar el video: {str(e)}'}, 500
+    
+    for channel in resultados['canales'].values():
+        del channel['histograma_imagen']
+    del resultados['video']['serie_temporal_imagen']
+    return resultados
+
+@app.route('/point-operations', methods=['GET'])
+def list_point_operations():
+    """Lista las operaciones puntuales disponibles y si requieren histograma"""
+    return {
+        'operaciones': {
+            name: {'usa_histograma': needs_histogram}
+            for name, (_, needs_histogram) in OPERATIONS.items()
+        }
+    }
+
+@app.route('/point-operations', methods=['POST'])
+def point_operations():
+    """
+    Aplica una cadena de operaciones puntuales a la imagen cargada.
+    
+    Recibe el archivo en 'file' y la cadena en el campo 'operaciones'
+    (lista JSON). Devuelve la imagen resultante en formato PNG.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return {'error': 'No se seleccionó ningún archivo'}, 400
+    if not allowed_file(file.filename):
+        return {'error': 'Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF'}, 400
+    
+    try:
+        operations = parse_operations(request.form.get('operaciones'))
+        img_array = load_image_array(file.stream)
+        resultado = apply_point_operations(img_array, operations)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': f'Error al procesar la imagen: {str(e)}'}, 500
+    
+    return send_file(image_array_to_png(resultado), mimetype='image/png',
+                     download_name=f"{os.path.splitext(secure_filename(file.filename))[0]}_procesada.png")
+
+@app.route('/preview', methods=['POST'])
+def create_preview():
+    """
+    Registra una imagen para vista previa progresiva y construye su pirámide.
+    
+    Devuelve el identificador de la sesión, el tamaño de cada nivel y el
+    nivel sugerido para la vista previa rápida.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return {'error': 'No se seleccionó ningún archivo'}, 400
+    if not allowed_file(file.filename):
+        return {'error': 'Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF'}, 400
+    
+    suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=app.config['UPLOAD_FOLDER']) as temp_file:
+        file.save(temp_file)
+    try:
+        preview_id = preview_cache.register(temp_file.name)
+        session = preview_cache.get(preview_id)
+    finally:
+        if os.path.exists(temp_file.name):
+            os.unlink(temp_file.name)
+    if session is None:
+        return {'error': 'No se pudo leer la imagen'}, 400
+    
+    return {
+        'id': preview_id,
+        'niveles': session.level_sizes,
+        'nivel_vista_previa': session.preview_level()
+    }
+
+@app.route('/preview/<preview_id>/render', methods=['POST'])
+def render_preview(preview_id):
+    """
+    Ejecuta una cadena de pasos sobre un nivel de la pirámide.
+    
+    Recibe JSON con 'pasos' (operaciones puntuales con la clave 'operacion'
+    y filtros con la clave 'filtro') y 'nivel' (entero o "vista_previa").
+    El cliente pide primero la vista previa y luego el nivel 0; los
+    prefijos de la cadena ya calculados se reutilizan. La pirámide se
+    construye en el primer render de la sesión. Devuelve PNG.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return {'error': 'El cuerpo debe ser un objeto JSON con "pasos" y "nivel"'}, 400
+    steps = payload.get('pasos', [])
+    level = payload.get('nivel', 'vista_previa')
+    
+    try:
+        if not isinstance(steps, list):
+            raise ValueError('El campo "pasos" debe ser una lista')
+        level = None if level == 'vista_previa' else int(level)
+        with timed('render'):
+            rendered = preview_cache.render(preview_id, steps, level)
+    except (TypeError, ValueError, OverflowError) as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': f'Error al procesar la imagen: {str(e)}'}, 500
+    
+    if rendered is None:
+        return {'error': 'La sesión de vista previa no existe o expiró. Vuelva a cargar la imagen'}, 404
+    resultado, level = rendered
+    response = send_file(image_array_to_png(resultado), mimetype='image/png')
+    response.headers['X-Preview-Level'] = str(level)
+    return response
+
 # TODO: Implementar procesamiento puntual de imágenes
 # - Operaciones aritméticas entre imágenes
-# - Transformaciones de intensidad (logarítmicas, exponenciales, etc.)
-
-# TODO: Implementar mejora de brillo y contraste
-# - Ajuste lineal de brillo/contraste
-# - Ecualización de histograma
-# - Estiramiento de contraste
-
-# TODO: Implementar filtros de ruido
-# - Filtro de media
-# - Filtro de mediana
-# - Filtros gaussianos
-# - Filtros de Wiener
-
-# TODO: Implementar detección de bordes
-# - Operadores de gradiente (Sobel, Prewitt)
-# - Operador Laplaciano
-# - Detector de bordes Canny
+
+@app.route('/filters', methods=['GET'])
+def list_filters():
+    """Lista los filtros de ruido y detectores de bordes disponibles"""
+    return {
+        'filtros': list(FILTERS),
+        'detectores_bordes': list(EDGE_DETECTORS)
+    }
+
+@app.route('/filters', methods=['POST'])
+def filters():
+    """
+    Aplica una cadena de filtros espaciales y/o detectores de bordes.
+    
+    Recibe el archivo en 'file' y la cadena en el campo 'filtros'
+    (lista JSON, por ejemplo [{"filtro": "gaussiano", "sigma": 1.5},
+    {"filtro": "canny"}]). Devuelve la imagen resultante en formato PNG.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return {'error': 'No se seleccionó ningún archivo'}, 400
+    if not allowed_file(file.filename):
+        return {'error': 'Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF'}, 400
+    
+    try:
+        operations = parse_operations(request.form.get('filtros'), field='filtros')
+        resultado = load_image_array(file.stream)
+        for operation in operations:
+            resultado = apply_filter(resultado, operation)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        return {'error': f'Error al procesar la imagen: {str(e)}'}, 500
+    
+    return send_file(image_array_to_png(resultado), mimetype='image/png',
+                     download_name=f"{os.path.splitext(secure_filename(file.filename))[0]}_filtrada.png")
+
+@app.route('/detect', methods=['POST'])
+def detect():
+    """
+    Detecta objetos en la imagen cargada usando el servicio de inferencia.
+    
+    Recibe el archivo en 'file' y opcionalmente la confianza mínima en el
+    campo 'conf'. El modelo no se carga en la aplicación: la imagen se
+    reenvía al servicio local, que agrupa las peticiones concurrentes en
+    lotes. Devuelve JSON con la lista de detecciones.
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return {'error': 'No se seleccionó ningún archivo'}, 400
+    if not allowed_file(file.filename):
+        return {'error': 'Tipo de archivo no permitido. Use: PNG, JPG, JPEG, GIF, BMP, TIFF'}, 400
+    
+    try:
+        confidence = float(request.form.get('conf', 0.25))
+    except ValueError:
+        return {'error': 'El campo "conf" debe ser un número'}, 400
+    
+    client = InferenceClient(app.config['INFERENCE_SERVICE_URL'])
+    try:
+        with timed('inferencia'):
+            detections = client.detect(file.read(), confidence, upload_content_type(file))
+    except InferenceServiceError as e:
+        if e.status == 400:
+            return {'error': str(e)}, 400
+        return {'error': f'Servicio de inferencia no disponible: {str(e)}'}, 503
+    
+    return {
+        'detecciones': detections,
+        'personas': sum(1 for detection in detections if detection['clase_id'] == 0)
+    }
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la Ruta de Análisis de la Aplicación Flask
+
+Genera imágenes sintéticas en varios tamaños, modos y formatos, mide las
+funciones del análisis (`get_image_metadata`, `analyze_channel_statistics`,
+`generate_histogram_image`, `process_image`) y hace una prueba de carga de
+`/upload` con el cliente de pruebas de Flask y varios hilos concurrentes.
+
+Informa rendimiento (operaciones por segundo), latencia p50/p99 y pico de
+memoria, y compara las cuatro medidas contra una línea base guardada en
+JSON. Los archivos que guarda `/upload` van a un directorio temporal.
+Funciona completamente sin conexión.
+
+Uso:
+    python benchmark_app.py --save-baseline      # guardar línea base
+    python benchmark_app.py                      # comparar contra la línea base
+    python benchmark_app.py --quick              # corrida rápida
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+from PIL import Image
+
+import app as web_app
+from instrumentation import RssSampler, current_rss_bytes
+
+DEFAULT_BASELINE_PATH = 'benchmark_baseline.json'
+
+# Anchos de las imágenes sintéticas (alto = 3/4 del ancho)
+DEFAULT_SIZES = (320, 1024, 2048)
+QUICK_SIZES = (320,)
+
+# Combinaciones (modo PIL, formato) a evaluar en cada tamaño
+IMAGE_VARIANTS = (
+    ('RGB', 'JPEG'),
+    ('RGB', 'PNG'),
+    ('RGBA', 'PNG'),
+    ('L', 'PNG'),
+    ('P', 'GIF'),
+    ('RGB', 'BMP'),
+    ('RGB', 'TIFF'),
+)
+
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'BMP': 'bmp', 'TIFF': 'tiff'}
+
+# Medidas comparadas contra la línea base y si un valor mayor es mejor
+COMPARED_MEASURES = (
+    ('ops_por_segundo', 'op/s', True),
+    ('p50_ms', 'ms', False),
+    ('p99_ms', 'ms', False),
+    ('pico_memoria_mb', 'MB', False),
+)
+
+# Diferencias de memoria menores a esto (MB) se consideran ruido
+MIN_MEMORY_CHANGE_MB = 1.0
+
+
+# ---------------------------------------------------------------------------
+# Generación de imágenes sintéticas
+# ---------------------------------------------------------------------------
+
+def create_base_scene(seed=0):
+    """
+    Escena base RGB para derivar todas las variantes.
+
+    Reutiliza el generador de `create_test_image.py` (siluetas de personas
+    sobre fondo) cuando OpenCV está instalado; si no, genera una escena
+    equivalente con gradientes y ruido usando sólo NumPy.
+
+    Returns:
+        PIL.Image: Imagen RGB
+    """
+    try:
+        from create_test_image import create_test_image_with_persons
+    except ImportError:
+        create_test_image_with_persons = None
+
+    if create_test_image_with_persons is not None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'escena.jpg')
+            create_test_image_with_persons(path)
+            with Image.open(path) as img:
+                return img.convert('RGB')
+
+    rng = np.random.default_rng(seed)
+    height, width = 600, 800
+    y, x = np.mgrid[0:height, 0:width]
+    scene = np.stack([
+        128 + 100 * np.sin(x / 40.0),
+        128 + 100 * np.cos(y / 30.0),
+        (x + y) * 255.0 / (width + height),
+    ], axis=2)
+    scene += rng.normal(0, 12, scene.shape)
+    return Image.fromarray(np.clip(scene, 0, 255).astype(np.uint8))
+
+
+def generate_variants(output_dir, sizes, variants=IMAGE_VARIANTS):
+    """
+    Guarda la escena base en cada combinación de tamaño, modo y formato.
+
+    Returns:
+        list: Diccionarios con 'nombre', 'ruta', 'ancho', 'modo' y 'formato'
+    """
+    base = create_base_scene()
+    cases = []
+    for width in sizes:
+        height = width * 3 // 4
+        resized = base.resize((width, height), Image.BILINEAR)
+        for mode, image_format in variants:
+            converted = resized.convert(mode) if mode != 'P' else resized.quantize(256)
+            name = f"{width}x{height}_{mode}_{image_format}"
+            path = os.path.join(output_dir, f"{name}.{FORMAT_EXTENSIONS[image_format]}")
+            converted.save(path, format=image_format)
+            cases.append({'nombre': name, 'ruta': path, 'ancho': width, 'modo': mode, 'formato': image_format})
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Medición
+# ---------------------------------------------------------------------------
+
+def summarize(latencies, elapsed, peak_bytes):
+    """Resume latencias (segundos) en rendimiento, p50, p99 y memoria."""
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        'ops_por_segundo': round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        'p50_ms': round(float(np.percentile(latencies_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies_ms, 99)), 3),
+        'pico_memoria_mb': round(peak_bytes / (1024 * 1024), 3),
+    }
+
+
+def micro_benchmark(func, repeat):
+    """
+    Ejecuta `func` `repeat` veces midiendo latencia y, en una corrida
+    adicional bajo tracemalloc, el pico de memoria asignada.
+    """
+    func()  # calentamiento (caches de fuentes, imports perezosos)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call_start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return summarize(latencies, elapsed, peak)
+
+
+def load_test(path, filename, requests_count, workers):
+    """
+    Envía `requests_count` peticiones a /upload con `workers` hilos.
+
+    Cada hilo usa su propio cliente de pruebas de Flask. El pico de memoria
+    informado es el aumento de RSS durante la prueba: el máximo muestreado
+    menos la RSS al comenzarla (no el pico histórico del proceso, que
+    incluye las pruebas anteriores).
+    """
+    with open(path, 'rb') as image_file:
+        payload = image_file.read()
+
+    def send(_):
+        client = web_app.app.test_client()
+        call_start = time.perf_counter()
+        response = client.post('/upload', data={'file': (io.BytesIO(payload), filename)},
+                               content_type='multipart/form-data')
+        latency = time.perf_counter() - call_start
+        if response.status_code != 200:
+            raise RuntimeError(f"/upload respondió {response.status_code} para {filename}")
+        return latency
+
+    send(None)  # calentamiento
+    sampler = RssSampler()
+    baseline_rss = current_rss_bytes()
+    token = sampler.start_request()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(send, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    peak_rss = sampler.finish_request(token)
+    return summarize(latencies, elapsed, peak_rss - baseline_rss)
+
+
+@contextmanager
+def temporary_upload_folder(directory):
+    """
+    Redirige los archivos que guarda /upload (temporales y originales de la
+    vista previa) a `directory` mientras dura el bloque.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous_folder = web_app.app.config['UPLOAD_FOLDER']
+    previous_storage = web_app.preview_cache.storage_dir
+    web_app.app.config['UPLOAD_FOLDER'] = directory
+    web_app.preview_cache.storage_dir = directory
+    try:
+        yield directory
+    finally:
+        web_app.app.config['UPLOAD_FOLDER'] = previous_folder
+        web_app.preview_cache.storage_dir = previous_storage
+
+
+def run_benchmarks(cases, repeat, requests_count, workers):
+    """Ejecuta todos los micro-benchmarks y pruebas de carga."""
+    results = {}
+
+    def record(name, summary):
+        results[name] = summary
+        print(f"   {name:<52} {summary['ops_por_segundo']:9.2f} op/s | "
+              f"p50 {summary['p50_ms']:9.2f} ms | p99 {summary['p99_ms']:9.2f} ms | "
+              f"{summary['pico_memoria_mb']:8.2f} MB")
+
+    print("\n🔬 Micro-benchmarks por variante")
+    for case in cases:
+        record(f"get_image_metadata[{case['nombre']}]",
+               micro_benchmark(lambda: web_app.get_image_metadata(case['ruta']), repeat))
+        record(f"process_image[{case['nombre']}]",
+               micro_benchmark(lambda: web_app.process_image(case['ruta']), repeat))
+
+    print("\n🔬 Micro-benchmarks por canal")
+    for width in sorted({case['ancho'] for case in cases}):
+        rgb_case = next(case for case in cases if case['ancho'] == width and case['modo'] == 'RGB')
+        with Image.open(rgb_case['ruta']) as img:
+            channel = np.array(img.convert('RGB'))[:, :, 0]
+        histogram, _ = np.histogram(channel, bins=256, range=(0, 256))
+        label = f"{channel.shape[1]}x{channel.shape[0]}"
+        record(f"analyze_channel_statistics[{label}]",
+               micro_benchmark(lambda: web_app.analyze_channel_statistics(channel, (0.8, 0.2, 0.2), "Rojo"), repeat))
+        record(f"analyze_channel_statistics[{label},sin_imagen]",
+               micro_benchmark(lambda: web_app.analyze_channel_statistics(
+                   channel, (0.8, 0.2, 0.2), "Rojo", include_histogram_image=False), repeat))
+        record(f"generate_histogram_image[{label}]",
+               micro_benchmark(lambda: web_app.generate_histogram_image(histogram, (0.8, 0.2, 0.2), "Rojo"), repeat))
+
+    print(f"\n🚀 Prueba de carga /upload ({requests_count} peticiones, {workers} hilos)")
+    for case in cases:
+        if case['modo'] == 'RGB' and case['formato'] == 'JPEG':
+            record(f"upload[{case['nombre']}]",
+                   load_test(case['ruta'], os.path.basename(case['ruta']), requests_count, workers))
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Comparación con la línea base
+# ---------------------------------------------------------------------------
+
+def measure_change(measure, previous, current, higher_is_better):
+    """
+    Empeoramiento porcentual de una medida (positivo = peor).
+
+    Returns:
+        float: Porcentaje, o None si no hay valor base con qué comparar
+    """
+    if previous is None or current is None or previous == 0:
+        return None
+    if measure == 'pico_memoria_mb' and abs(current - previous) < MIN_MEMORY_CHANGE_MB:
+        return 0.0
+    change = (current - previous) / abs(previous) * 100
+    return -change if higher_is_better else change
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compara rendimiento, p50, p99 y pico de memoria contra la línea base.
+
+    Returns:
+        list: Nombres de los benchmarks con alguna medida que empeoró más de
+            `tolerance` (%)
+    """
+    regressions = []
+    print("\n📊 Comparación con la línea base")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"   {name:<52} (sin línea base)")
+            continue
+        worst = None
+        details = []
+        for measure, unit, higher_is_better in COMPARED_MEASURES:
+            change = measure_change(measure, previous.get(measure), current.get(measure), higher_is_better)
+            if change is None:
+                continue
+            mark = " ❌" if change > tolerance else ""
+            details.append(f"{measure} {previous[measure]:.2f} -> {current[measure]:.2f} {unit} "
+                           f"({change:+.1f}%){mark}")
+            worst = change if worst is None else max(worst, change)
+        if worst is None:
+            print(f"   {name:<52} (sin línea base)")
+            continue
+        if worst > tolerance:
+            status = "❌"
+            regressions.append(name)
+        elif worst < -tolerance:
+            status = "🚀"
+        else:
+            status = "✅"
+        print(f"   {status} {name}")
+        for detail in details:
+            print(f"        {detail}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark y prueba de carga de la ruta de análisis de imágenes"
+    )
+    parser.add_argument('--sizes', type=int, nargs='+', default=None,
+                        help=f"Anchos de las imágenes (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--repeat', type=int, default=5, help="Repeticiones por micro-benchmark (default: 5)")
+    parser.add_argument('--requests', type=int, default=20, help="Peticiones por prueba de carga (default: 20)")
+    parser.add_argument('--workers', type=int, default=4, help="Hilos concurrentes de la prueba de carga (default: 4)")
+    parser.add_argument('--quick', action='store_true', help="Corrida rápida: un tamaño y pocas repeticiones")
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE_PATH,
+                        help=f"Archivo de línea base (default: {DEFAULT_BASELINE_PATH})")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar los resultados como nueva línea base")
+    parser.add_argument('--tolerance', type=float, default=10.0,
+                        help="Porcentaje de empeoramiento (op/s, p50, p99 o memoria) considerado "
+                             "regresión (default: 10)")
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    repeat = 2 if args.quick else args.repeat
+    requests_count = 4 if args.quick else args.requests
+
+    print("⏱️  Benchmark de la ruta de análisis Flask")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = generate_variants(tmp_dir, sizes)
+        print(f"🖼️  {len(cases)} imágenes sintéticas generadas ({', '.join(map(str, sizes))} px de ancho)")
+        with temporary_upload_folder(os.path.join(tmp_dir, 'uploads')):
+            results = run_benchmarks(cases, repeat, requests_count, args.workers)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(f"\n💾 Línea base guardada en: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No hay línea base en {args.baseline}. Use --save-baseline para crearla")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+
+    print("\n" + "=" * 50)
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) empeoraron más de {args.tolerance:g}%")
+        return 1
+    print("✅ Sin regresiones respecto de la línea base")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
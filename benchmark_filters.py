@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark del Motor de Filtros Espaciales
+
+Compara los filtros de `spatial_filters.py` contra implementaciones de
+referencia basadas en convolución directa (ventana completa por píxel),
+verificando que los resultados coincidan y midiendo la aceleración.
+
+Uso:
+    python benchmark_filters.py --size 512 --radios 1 3 7
+"""
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+import spatial_filters
+
+# Filas procesadas por bloque en las referencias para acotar la memoria
+REFERENCE_CHUNK_ROWS = 32
+
+
+# ---------------------------------------------------------------------------
+# Implementaciones de referencia (convolución directa)
+# ---------------------------------------------------------------------------
+
+def _reference_windows(image, radius, reducer):
+    """Aplica `reducer` sobre la ventana completa de cada píxel, por bloques de filas."""
+    padded = np.pad(image, radius, mode='reflect')
+    size = 2 * radius + 1
+    output = np.empty(image.shape, dtype=np.float64)
+    for start in range(0, image.shape[0], REFERENCE_CHUNK_ROWS):
+        end = min(start + REFERENCE_CHUNK_ROWS, image.shape[0])
+        windows = sliding_window_view(padded[start:end + 2 * radius], (size, size))
+        output[start:end] = reducer(windows.reshape(windows.shape[:2] + (-1,)))
+    return output
+
+
+def reference_mean(image, radio):
+    result = _reference_windows(image, radio, lambda w: w.mean(axis=-1))
+    return np.clip(np.rint(result), 0, 255).astype(np.uint8)
+
+
+def reference_median(image, radio):
+    return _reference_windows(image, radio, lambda w: np.median(w, axis=-1)).astype(np.uint8)
+
+
+def reference_gaussian(image, sigma):
+    kernel_1d = spatial_filters.gaussian_kernel(sigma)
+    kernel = np.outer(kernel_1d, kernel_1d).ravel()
+    radius = len(kernel_1d) // 2
+    result = _reference_windows(image, radius, lambda w: w @ kernel)
+    return np.clip(np.rint(result), 0, 255).astype(np.uint8)
+
+
+def reference_wiener(image, radio):
+    gray = image.astype(np.float64)
+    mean = _reference_windows(gray, radio, lambda w: w.mean(axis=-1))
+    variance = _reference_windows(gray, radio, lambda w: w.var(axis=-1))
+    noise = float(np.mean(variance))
+    gain = np.maximum(variance - noise, 0) / np.maximum(variance, noise)
+    return np.clip(np.rint(mean + gain * (gray - mean)), 0, 255).astype(np.uint8)
+
+
+def _reference_gradients(gray, smooth):
+    kx = np.outer(smooth, [-1.0, 0.0, 1.0]).ravel()
+    ky = np.outer([-1.0, 0.0, 1.0], smooth).ravel()
+    gx = _reference_windows(gray, 1, lambda w: w @ kx)
+    gy = _reference_windows(gray, 1, lambda w: w @ ky)
+    return gx, gy
+
+
+def reference_sobel(image):
+    return np.hypot(*_reference_gradients(image.astype(np.float64), [1.0, 2.0, 1.0]))
+
+
+def reference_prewitt(image):
+    return np.hypot(*_reference_gradients(image.astype(np.float64), [1.0, 1.0, 1.0]))
+
+
+def reference_laplacian(image):
+    kernel = np.array([[0, 1, 0], [1, -4, 1], [0, 1, 0]], dtype=np.float64).ravel()
+    return np.abs(_reference_windows(image.astype(np.float64), 1, lambda w: w @ kernel))
+
+
+def reference_hysteresis(strong, weak):
+    """Recorrido en anchura píxel a píxel desde cada borde fuerte (8-vecinos)."""
+    height, width = strong.shape
+    edges = strong.copy()
+    candidates = weak | strong
+    queue = deque(zip(*np.nonzero(strong)))
+    while queue:
+        y, x = queue.popleft()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                ny, nx = y + dy, x + dx
+                if 0 <= ny < height and 0 <= nx < width and candidates[ny, nx] and not edges[ny, nx]:
+                    edges[ny, nx] = True
+                    queue.append((ny, nx))
+    return edges
+
+
+def reference_canny(image, sigma):
+    kernel_1d = spatial_filters.gaussian_kernel(sigma)
+    radius = len(kernel_1d) // 2
+    smoothed = _reference_windows(image.astype(np.float64), radius,
+                                  lambda w: w @ np.outer(kernel_1d, kernel_1d).ravel())
+    gx, gy = _reference_gradients(smoothed, [1.0, 2.0, 1.0])
+    magnitude = spatial_filters._non_maximum_suppression(np.hypot(gx, gy), spatial_filters._gradient_angle(gx, gy))
+    peak = float(magnitude.max())
+    strong = magnitude >= 0.2 * peak
+    weak = (magnitude >= 0.1 * peak) & ~strong
+    return reference_hysteresis(strong, weak).astype(np.uint8) * 255
+
+
+# ---------------------------------------------------------------------------
+# Ejecución del benchmark
+# ---------------------------------------------------------------------------
+
+def create_benchmark_image(size, seed=0):
+    """
+    Genera una imagen de prueba en escala de grises con estructura y ruido.
+
+    Args:
+        size: Lado de la imagen cuadrada en píxeles
+        seed: Semilla para reproducibilidad
+
+    Returns:
+        np.ndarray: Imagen uint8 de size x size
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    pattern = 128 + 60 * np.sin(x / 17.0) * np.cos(y / 23.0)
+    noise = rng.normal(0, 20, (size, size))
+    return np.clip(pattern + noise, 0, 255).astype(np.uint8)
+
+
+def time_call(func, repeat):
+    """Devuelve (mejor tiempo en segundos, resultado) de `repeat` ejecuciones."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_case(name, fast, reference, repeat, binary=False):
+    """
+    Ejecuta un caso, compara resultados y muestra tiempos y aceleración.
+
+    Para mapas binarios (Canny) la comparación es la fracción de píxeles
+    distintos: empates de magnitud en la supresión de no máximos pueden
+    resolverse distinto por el orden de las sumas en punto flotante.
+    """
+    fast_time, fast_result = time_call(fast, repeat)
+    ref_time, ref_result = time_call(reference, 1)
+    if binary:
+        mismatch = float(np.mean(fast_result != ref_result))
+        ok, detail = mismatch <= 0.001, f"píxeles distintos: {mismatch:.4%}"
+    else:
+        max_diff = float(np.max(np.abs(fast_result.astype(np.float64) - ref_result.astype(np.float64))))
+        ok, detail = max_diff <= 1.0, f"dif. máx: {max_diff:.3f}"
+    status = "✅" if ok else "❌"
+    speedup = ref_time / fast_time if fast_time > 0 else float('inf')
+    print(f"{status} {name:<22} motor: {fast_time * 1000:9.1f} ms | "
+          f"referencia: {ref_time * 1000:9.1f} ms | x{speedup:6.1f} | {detail}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara el motor de filtros contra convolución directa"
+    )
+    parser.add_argument('--size', type=int, default=512, help="Lado de la imagen de prueba (default: 512)")
+    parser.add_argument('--radios', type=int, nargs='+', default=[1, 3, 7],
+                        help="Radios a evaluar para media, mediana y Wiener (default: 1 3 7)")
+    parser.add_argument('--sigmas', type=float, nargs='+', default=[1.0, 3.0],
+                        help="Sigmas a evaluar para el filtro gaussiano y Canny (default: 1 3)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Hilos del motor (default: uno por núcleo)")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones del motor (default: 3)")
+    args = parser.parse_args()
+
+    workers = args.workers or spatial_filters.default_workers()
+    image = create_benchmark_image(args.size)
+
+    print("⏱️  Benchmark del motor de filtros espaciales")
+    print("=" * 50)
+    print(f"   - Imagen: {args.size}x{args.size} (uint8)")
+    print(f"   - Hilos: {workers}")
+    print()
+
+    results = []
+    for radius in args.radios:
+        results.append(run_case(
+            f"media r={radius}",
+            lambda: spatial_filters.mean_filter(image, radius, workers),
+            lambda: reference_mean(image, radius), args.repeat))
+        results.append(run_case(
+            f"mediana r={radius}",
+            lambda: spatial_filters.median_filter(image, radius, workers),
+            lambda: reference_median(image, radius), args.repeat))
+        results.append(run_case(
+            f"wiener r={radius}",
+            lambda: spatial_filters.wiener_filter(image, radius, workers=workers),
+            lambda: reference_wiener(image, radius), args.repeat))
+    for sigma in args.sigmas:
+        results.append(run_case(
+            f"gaussiano sigma={sigma:g}",
+            lambda: spatial_filters.gaussian_filter(image, sigma, workers),
+            lambda: reference_gaussian(image, sigma), args.repeat))
+        results.append(run_case(
+            f"canny sigma={sigma:g}",
+            lambda: spatial_filters.canny(image, sigma, workers=workers),
+            lambda: reference_canny(image, sigma), args.repeat, binary=True))
+    results.append(run_case(
+        "sobel",
+        lambda: spatial_filters.sobel(image, workers),
+        lambda: reference_sobel(image), args.repeat))
+    results.append(run_case(
+        "prewitt",
+        lambda: spatial_filters.prewitt(image, workers),
+        lambda: reference_prewitt(image), args.repeat))
+    results.append(run_case(
+        "laplaciano",
+        lambda: spatial_filters.laplacian(image, workers),
+        lambda: reference_laplacian(image), args.repeat))
+
+    print("\n" + "=" * 50)
+    if all(results):
+        print("✅ Todos los resultados coinciden con la referencia")
+        return 0
+    print("❌ Hay diferencias con la referencia")
+    return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
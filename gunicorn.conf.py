@@ -0,0 +1,216 @@
+"""
+Configuración de Gunicorn para el modo de producción
+
+Uso:
+    gunicorn -c gunicorn.conf.py app:app
+
+- La aplicación se carga en el proceso padre antes del fork (`preload_app`):
+  Flask, NumPy, Pillow y matplotlib (con su caché de fuentes) se importan y
+  se calientan una sola vez y los workers comparten esas páginas de memoria.
+- Cada worker ejecuta un análisis de prueba antes de recibir tráfico.
+- El presupuesto de memoria por worker y el límite de la caché de vista
+  previa se derivan uno del otro:
+      presupuesto = memoria base + caché de vista previa + pico de una
+                    petición con una imagen de tamaño máximo
+- La cantidad de workers se calcula para que entren en el límite de memoria
+  del contenedor (el análisis es intensivo en CPU: como mucho uno por
+  núcleo), y un worker que supera su presupuesto se reinicia al terminar la
+  petición en curso.
+- Los filtros espaciales usan los núcleos que no ocupan los workers
+  (FILTER_WORKERS), en lugar de un hilo por núcleo en cada worker.
+- /metrics suma las métricas de todos los workers (METRICS_DIR).
+
+Variables de entorno:
+    PORT                      Puerto de escucha (default: 5000)
+    WEB_CONCURRENCY           Cantidad de workers (default: calculada)
+    WORKER_MEMORY_BUDGET_MB   Presupuesto de memoria (PSS) por worker
+                              (default: derivado de PREVIEW_CACHE_MB)
+    PREVIEW_CACHE_MB          Caché de vista previa por worker (default: 256,
+                              o el resto del presupuesto si éste se define)
+    MAX_IMAGE_MEGAPIXELS      Tamaño máximo de imagen aceptado (default: 12)
+    CONTAINER_MEMORY_LIMIT_MB Límite de memoria (default: leído de cgroups)
+    FILTER_WORKERS            Hilos de los filtros por worker (default: calculado)
+    METRICS_DIR               Directorio compartido de métricas
+                              (default: <tmp>/gunicorn-metrics)
+"""
+
+import math
+import os
+import tempfile
+import time
+
+from instrumentation import clear_metrics_dir, current_rss_bytes, mark_process_dead, reset_metrics
+
+# Instante de arranque del proceso padre (el archivo se carga al iniciar)
+_STARTED_AT = time.perf_counter()
+
+# Memoria reservada para el proceso padre y el sistema
+MASTER_OVERHEAD_MB = 96
+
+# Memoria de un worker con la aplicación importada y calentada (~100 MB de PSS medidos)
+WORKER_BASE_MEMORY_MB = 128
+
+# Pico transitorio de una petición por megapíxel de imagen: peor caso de los
+# filtros medido con un render a resolución completa de ruido uniforme de
+# 4000 × 3000 RGB, donde Canny (el filtro más costoso) llega a +363 MB sobre
+# la memoria base (~30 MB/MP), más margen
+REQUEST_MEMORY_MB_PER_MEGAPIXEL = 34
+
+DEFAULT_PREVIEW_CACHE_MB = 256
+DEFAULT_MAX_IMAGE_MEGAPIXELS = 12
+
+# Caché mínima aceptable cuando se deriva del presupuesto
+MIN_PREVIEW_CACHE_MB = 32
+
+# Rutas del límite de memoria del contenedor (cgroups v2 y v1)
+CGROUP_MEMORY_LIMIT_FILES = (
+    '/sys/fs/cgroup/memory.max',
+    '/sys/fs/cgroup/memory/memory.limit_in_bytes',
+)
+
+
+def container_memory_limit_mb():
+    """Límite de memoria del contenedor en MB, o None si no hay límite."""
+    if os.environ.get('CONTAINER_MEMORY_LIMIT_MB'):
+        return int(os.environ['CONTAINER_MEMORY_LIMIT_MB'])
+    for path in CGROUP_MEMORY_LIMIT_FILES:
+        try:
+            with open(path) as limit_file:
+                value = limit_file.read().strip()
+        except OSError:
+            continue
+        # "max" (v2) o un valor enorme (v1) indican que no hay límite
+        if value.isdigit() and int(value) < 2 ** 50:
+            return int(value) // (1024 * 1024)
+    return None
+
+
+def worker_memory_mb():
+    """
+    Memoria del worker en MB para comparar contra su presupuesto.
+
+    Usa PSS (/proc/self/smaps_rollup), que reparte entre los procesos las
+    páginas compartidas con el padre; la RSS las contaría completas en cada
+    worker. Si PSS no está disponible se usa la RSS.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as rollup:
+            for line in rollup:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return current_rss_bytes() / (1024 * 1024)
+
+
+def request_memory_mb(max_megapixels):
+    """Pico transitorio de memoria de una petición con una imagen de `max_megapixels`."""
+    return math.ceil(max_megapixels * REQUEST_MEMORY_MB_PER_MEGAPIXEL)
+
+
+def memory_settings():
+    """
+    Presupuesto de memoria por worker y límite de la caché de vista previa.
+
+    Si se define WORKER_MEMORY_BUDGET_MB, la caché recibe lo que queda del
+    presupuesto; si no, el presupuesto se calcula a partir de
+    PREVIEW_CACHE_MB. Si se definen ambos deben ser compatibles.
+
+    Returns:
+        tuple: (presupuesto por worker en MB, caché de vista previa en MB)
+    """
+    max_megapixels = float(os.environ.get('MAX_IMAGE_MEGAPIXELS', DEFAULT_MAX_IMAGE_MEGAPIXELS))
+    fixed_mb = WORKER_BASE_MEMORY_MB + request_memory_mb(max_megapixels)
+    budget_env = os.environ.get('WORKER_MEMORY_BUDGET_MB')
+    cache_env = os.environ.get('PREVIEW_CACHE_MB')
+
+    if not budget_env:
+        cache_mb = int(cache_env or DEFAULT_PREVIEW_CACHE_MB)
+        return fixed_mb + cache_mb, cache_mb
+
+    budget_mb = int(budget_env)
+    cache_mb = int(cache_env) if cache_env else budget_mb - fixed_mb
+    if cache_mb < MIN_PREVIEW_CACHE_MB or fixed_mb + cache_mb > budget_mb:
+        raise ValueError(
+            f"WORKER_MEMORY_BUDGET_MB={budget_mb} no alcanza: un worker necesita {WORKER_BASE_MEMORY_MB} MB "
+            f"de base, {fixed_mb - WORKER_BASE_MEMORY_MB} MB para una imagen de {max_megapixels:g} MP y "
+            f"al menos {max(cache_mb, MIN_PREVIEW_CACHE_MB)} MB de caché de vista previa")
+    return budget_mb, cache_mb
+
+
+def default_worker_count(budget_mb):
+    """Workers según CPU (uno por núcleo), acotados por la memoria disponible."""
+    by_cpu = os.cpu_count() or 1
+    limit_mb = container_memory_limit_mb()
+    if limit_mb is None:
+        return by_cpu
+    return max(1, min(by_cpu, (limit_mb - MASTER_OVERHEAD_MB) // budget_mb))
+
+
+worker_memory_budget_mb, preview_cache_mb = memory_settings()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', default_worker_count(worker_memory_budget_mb)))
+
+# La aplicación se importa después de leer este archivo: lee estos valores del entorno
+os.environ['PREVIEW_CACHE_MB'] = str(preview_cache_mb)
+os.environ.setdefault('FILTER_WORKERS', str(max(1, (os.cpu_count() or 1) // workers)))
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'gunicorn-metrics'))
+worker_class = 'sync'
+preload_app = True
+timeout = 120
+graceful_timeout = 30
+
+# Reciclar workers periódicamente para acotar la fragmentación de memoria
+max_requests = 500
+max_requests_jitter = 50
+
+accesslog = '-'
+
+
+def on_starting(server):
+    clear_metrics_dir(metrics_dir)
+    limit_mb = container_memory_limit_mb()
+    server.log.info(f"🚀 Iniciando {workers} worker(s) con presupuesto de "
+                    f"{worker_memory_budget_mb} MB cada uno ({preview_cache_mb} MB de caché de vista previa, "
+                    f"{os.environ['FILTER_WORKERS']} hilo(s) de filtros; "
+                    f"límite del contenedor: {f'{limit_mb} MB' if limit_mb else 'sin límite'})")
+    if limit_mb is not None and MASTER_OVERHEAD_MB + workers * worker_memory_budget_mb > limit_mb:
+        server.log.warning(f"⚠️  {workers} worker(s) de {worker_memory_budget_mb} MB no entran en "
+                           f"{limit_mb} MB: reduzca PREVIEW_CACHE_MB o MAX_IMAGE_MEGAPIXELS")
+
+
+def when_ready(server):
+    # Con preload_app la aplicación ya fue importada en este punto:
+    # calentar en el padre para que los workers hereden matplotlib y sus fuentes
+    from app import warm_up
+
+    warm_duration = warm_up()
+    server.log.info(f"🔥 Proceso padre calentado en {warm_duration:.2f} s")
+    server.log.info(f"⏱️  Arranque en frío: {time.perf_counter() - _STARTED_AT:.2f} s "
+                    f"(RSS padre: {current_rss_bytes() / (1024 * 1024):.0f} MB)")
+
+
+def post_fork(server, worker):
+    # Se ejecuta en el worker antes de que empiece a aceptar conexiones
+    from app import warm_up
+
+    warm_duration = warm_up()
+    # Descartar las métricas heredadas del padre y las del calentamiento
+    reset_metrics()
+    server.log.info(f"🔥 Worker {worker.pid} calentado en {warm_duration:.2f} s "
+                    f"(PSS: {worker_memory_mb():.0f} MB)")
+
+
+def post_request(worker, req, environ, resp):
+    # Reinicio ordenado si el worker excede su presupuesto de memoria
+    memory_mb = worker_memory_mb()
+    if memory_mb > worker_memory_budget_mb:
+        worker.log.warning(f"♻️  Worker {worker.pid} usa {memory_mb:.0f} MB "
+                           f"(presupuesto {worker_memory_budget_mb} MB): se reinicia")
+        worker.alive = False
+
+
+def child_exit(server, worker):
+    # Conservar los contadores del worker terminado en /metrics
+    mark_process_dead(metrics_dir, worker.pid)
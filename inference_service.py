@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Servicio Local de Inferencia YOLOv8 con Batching Dinámico
+
+Proceso de larga duración que carga el modelo YOLOv8n una sola vez y atiende
+peticiones de detección de todas las herramientas (aplicación Flask,
+`video_processor.py`, `test_detection.py`) por HTTP en localhost o por un
+socket Unix.
+
+Las peticiones que llegan dentro de una ventana corta se agrupan en un único
+lote (una sola pasada del modelo). La ventana se cuenta desde la llegada de
+la primera petición del lote, de modo que ninguna espera más de
+`--max-wait-ms` antes de entrar al modelo.
+
+Uso:
+    python inference_service.py                          # http://127.0.0.1:8765
+    python inference_service.py --socket /tmp/yolo.sock  # socket Unix
+
+Cliente:
+    client = InferenceClient('http://127.0.0.1:8765')   # o 'unix:///tmp/yolo.sock'
+    detecciones = client.detect_frame(frame_bgr)
+
+Este módulo sólo importa ultralytics/OpenCV al iniciar el servidor; el
+cliente no los necesita.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+
+DEFAULT_SERVICE_URL = 'http://127.0.0.1:8765'
+DEFAULT_MODEL_PATH = 'yolov8n.pt'
+
+# Parámetros del batching dinámico
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10
+
+# Confianza mínima por defecto de las detecciones devueltas
+DEFAULT_CONFIDENCE = 0.25
+
+# Tiempo máximo de espera del cliente (segundos)
+CLIENT_TIMEOUT = 30
+
+
+def service_url_from_env():
+    """URL del servicio configurada en INFERENCE_SERVICE_URL (o None)."""
+    return os.environ.get('INFERENCE_SERVICE_URL') or None
+
+
+def results_to_detections(result, names, min_confidence=0.0):
+    """
+    Convierte un resultado de ultralytics en una lista de diccionarios.
+
+    Es el formato común que devuelven tanto el modelo local como el servicio.
+
+    Args:
+        result: Elemento de la lista devuelta por `model(...)`
+        names: Diccionario id -> nombre de clase del modelo
+        min_confidence: Descarta detecciones con menor confianza
+
+    Returns:
+        list: [{'clase_id', 'clase', 'confianza', 'caja': [x1, y1, x2, y2]}]
+    """
+    detections = []
+    if result.boxes is None:
+        return detections
+    for box in result.boxes:
+        confidence = float(box.conf[0])
+        if confidence < min_confidence:
+            continue
+        class_id = int(box.cls[0])
+        detections.append({
+            'clase_id': class_id,
+            'clase': names[class_id],
+            'confianza': confidence,
+            'caja': [float(value) for value in box.xyxy[0]],
+        })
+    return detections
+
+
+# ---------------------------------------------------------------------------
+# Batching dinámico
+# ---------------------------------------------------------------------------
+
+class DynamicBatcher:
+    """
+    Agrupa peticiones concurrentes en lotes para una única pasada del modelo.
+
+    Un hilo toma la primera petición de la cola y sigue agregando las que
+    llegan hasta completar `max_batch_size` o hasta que vence la ventana de
+    `max_wait_ms` contada desde la llegada de esa primera petición.
+
+    Args:
+        predict_batch: Función (imágenes, confianza_mínima) -> lista de
+            listas de detecciones, una por imagen
+        max_batch_size: Tamaño máximo del lote
+        max_wait_ms: Espera máxima para completar un lote
+    """
+
+    def __init__(self, predict_batch, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.batches_processed = 0
+        self.images_processed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='dynamic-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, image, confidence=DEFAULT_CONFIDENCE):
+        """
+        Encola una imagen para detección.
+
+        Returns:
+            Future: Se resuelve con la lista de detecciones de la imagen;
+                su atributo `batch_size` indica el tamaño del lote en que se procesó
+        """
+        future = Future()
+        self._queue.put((time.perf_counter(), image, confidence, future))
+        return future
+
+    def _collect_batch(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[0] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Vencida la ventana, se toman sólo las peticiones que ya esperan en la cola
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            images = [item[1] for item in batch]
+            confidences = [item[2] for item in batch]
+            try:
+                # Se infiere con la confianza más baja del lote y luego se filtra por petición
+                outputs = self.predict_batch(images, min(confidences))
+            except Exception as e:
+                for item in batch:
+                    item[3].set_exception(e)
+                continue
+
+            self.batches_processed += 1
+            self.images_processed += len(batch)
+            for index, (_, _, confidence, future) in enumerate(batch):
+                future.batch_size = len(batch)
+                if index >= len(outputs):
+                    # Ninguna petición debe quedar esperando un resultado que no llegará
+                    future.set_exception(RuntimeError(
+                        f"El modelo devolvió {len(outputs)} resultados para un lote de {len(batch)} imágenes"
+                    ))
+                    continue
+                future.set_result([d for d in outputs[index] if d['confianza'] >= confidence])
+
+
+# ---------------------------------------------------------------------------
+# Servidor
+# ---------------------------------------------------------------------------
+
+def load_batch_predictor(model_path=DEFAULT_MODEL_PATH):
+    """
+    Carga el modelo YOLO y devuelve la función de inferencia por lotes.
+
+    Returns:
+        function: predict_batch(imágenes, confianza) para `DynamicBatcher`
+    """
+    from ultralytics import YOLO
+
+    print(f"🔄 Cargando modelo {model_path}...")
+    model = YOLO(model_path)
+    print("✅ Modelo cargado exitosamente")
+
+    def predict_batch(images, confidence):
+        results = model(images, conf=confidence, verbose=False)
+        return [results_to_detections(result, model.names) for result in results]
+
+    return predict_batch
+
+
+def decode_image(body, content_type, query):
+    """
+    Decodifica el cuerpo de una petición a una imagen BGR (convención OpenCV).
+
+    Acepta una imagen codificada (JPEG, PNG, etc.) o, con content type
+    application/octet-stream, un frame BGR crudo cuyo tamaño se indica con
+    los parámetros 'alto' y 'ancho'.
+    """
+    if content_type == 'application/octet-stream':
+        try:
+            height, width = int(query['alto'][0]), int(query['ancho'][0])
+        except (KeyError, ValueError):
+            raise ValueError("Los frames crudos requieren los parámetros 'alto' y 'ancho'") from None
+        if len(body) != height * width * 3:
+            raise ValueError("El tamaño del frame no coincide con alto x ancho x 3")
+        return np.frombuffer(body, dtype=np.uint8).reshape(height, width, 3)
+
+    import cv2
+
+    image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("No se pudo decodificar la imagen")
+    return image
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """Atiende GET /health y POST /detect."""
+
+    server_version = 'InferenceService/1.0'
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            self._send_json(404, {'error': 'Ruta no encontrada'})
+            return
+        batcher = self.server.batcher
+        batches = batcher.batches_processed
+        self._send_json(200, {
+            'estado': 'ok',
+            'modelo': self.server.model_path,
+            'lotes_procesados': batches,
+            'imagenes_procesadas': batcher.images_processed,
+            'tamaño_lote_promedio': round(batcher.images_processed / batches, 2) if batches else 0,
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/detect':
+            self._send_json(404, {'error': 'Ruta no encontrada'})
+            return
+
+        query = parse_qs(url.query)
+        start = time.perf_counter()
+        try:
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            confidence = float(query.get('conf', [DEFAULT_CONFIDENCE])[0])
+            image = decode_image(body, self.headers.get('Content-Type', ''), query)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            future = self.server.batcher.submit(image, confidence)
+            detections = future.result()
+        except Exception as e:
+            self._send_json(500, {'error': f'Error durante la inferencia: {str(e)}'})
+            return
+
+        self._send_json(200, {
+            'detecciones': detections,
+            'tamaño_lote': future.batch_size,
+            'tiempo_ms': round((time.perf_counter() - start) * 1000, 2),
+        })
+
+    def address_string(self):
+        # En sockets Unix client_address no es una tupla (host, puerto)
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class UnixInferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Servidor HTTP sobre un socket Unix, un hilo por conexión."""
+
+    daemon_threads = True
+
+
+def create_server(batcher, model_path, host='127.0.0.1', port=8765, socket_path=None, verbose=False):
+    """
+    Crea el servidor HTTP (TCP en localhost o socket Unix).
+
+    Returns:
+        socketserver.BaseServer: Servidor listo para `serve_forever()`
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixInferenceServer(socket_path, InferenceRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), InferenceRequestHandler)
+    server.batcher = batcher
+    server.model_path = model_path
+    server.verbose = verbose
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Cliente
+# ---------------------------------------------------------------------------
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """Conexión HTTP sobre un socket Unix."""
+
+    def __init__(self, socket_path, timeout=CLIENT_TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class InferenceServiceError(Exception):
+    """
+    Error al comunicarse con el servicio de inferencia.
+
+    `status` es el código HTTP devuelto por el servicio, o None si no se pudo
+    conectar.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class InferenceClient:
+    """
+    Cliente del servicio de inferencia.
+
+    Args:
+        url: 'http://host:puerto' o 'unix:///ruta/al/socket'
+        timeout: Tiempo máximo de espera por petición (segundos)
+    """
+
+    def __init__(self, url=DEFAULT_SERVICE_URL, timeout=CLIENT_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        parsed = urlparse(url)
+        if parsed.scheme == 'unix':
+            self._connect = lambda: UnixHTTPConnection(parsed.path, timeout)
+        elif parsed.scheme == 'http':
+            self._connect = lambda: http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        else:
+            raise ValueError(f"URL de servicio no soportada: {url}. Use http:// o unix://")
+
+    def _request(self, method, path, body=None, headers=None):
+        connection = self._connect()
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            payload = json.loads(response.read().decode('utf-8'))
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise InferenceServiceError(f"No se pudo conectar con el servicio de inferencia en {self.url}: {e}") from e
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise InferenceServiceError(payload.get('error', f'Error HTTP {response.status}'), response.status)
+        return payload
+
+    def health(self):
+        """Estado y estadísticas de batching del servicio."""
+        return self._request('GET', '/health')
+
+    def detect(self, image_bytes, confidence=DEFAULT_CONFIDENCE, content_type='image/jpeg'):
+        """
+        Detecta objetos en una imagen codificada (JPEG, PNG, etc.).
+
+        Returns:
+            list: Detecciones en el formato de `results_to_detections`
+        """
+        path = '/detect?' + urlencode({'conf': confidence})
+        payload = self._request('POST', path, body=image_bytes, headers={'Content-Type': content_type})
+        return payload['detecciones']
+
+    def detect_frame(self, frame, confidence=DEFAULT_CONFIDENCE):
+        """
+        Detecta objetos en un frame BGR (array numpy uint8 alto x ancho x 3).
+
+        El frame se envía sin comprimir, lo que evita codificarlo en cada frame.
+        """
+        height, width = frame.shape[:2]
+        path = '/detect?' + urlencode({'conf': confidence, 'alto': height, 'ancho': width})
+        payload = self._request('POST', path, body=frame.tobytes(),
+                                headers={'Content-Type': 'application/octet-stream'})
+        return payload['detecciones']
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Servicio local de inferencia YOLOv8 con batching dinámico"
+    )
+    parser.add_argument('--host', type=str, default='127.0.0.1', help="Host de escucha (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="Puerto de escucha (default: 8765)")
+    parser.add_argument('--socket', type=str, default=None, help="Escuchar en un socket Unix en lugar de TCP")
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL_PATH,
+                        help=f"Modelo YOLO (default: {DEFAULT_MODEL_PATH})")
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Tamaño máximo del lote (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help=f"Espera máxima para completar un lote en ms (default: {DEFAULT_MAX_WAIT_MS})")
+    parser.add_argument('--verbose', action='store_true', help="Registrar cada petición")
+    args = parser.parse_args()
+
+    print("🤖 Servicio de Inferencia YOLOv8")
+    print("=" * 50)
+
+    predict_batch = load_batch_predictor(args.model)
+    batcher = DynamicBatcher(predict_batch, args.max_batch_size, args.max_wait_ms)
+    server = create_server(batcher, args.model, args.host, args.port, args.socket, args.verbose)
+
+    address = f"unix://{args.socket}" if args.socket else f"http://{args.host}:{args.port}"
+    print(f"🚀 Escuchando en {address}")
+    print(f"   - Lote máximo: {args.max_batch_size} imágenes")
+    print(f"   - Espera máxima: {args.max_wait_ms:g} ms")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️  Servicio detenido por el usuario")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
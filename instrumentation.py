@@ -0,0 +1,534 @@
+"""
+Instrumentación de la Aplicación Web
+
+Mide cuánto tarda cada etapa del procesamiento de una petición y lo expone:
+
+- En la cabecera `Server-Timing` de cada respuesta (visible en las
+  herramientas de desarrollo del navegador).
+- En el endpoint `/metrics` en formato de texto de Prometheus: histogramas
+  de latencia por endpoint y por etapa, peticiones en curso, bytes
+  procesados y pico de memoria residente (RSS) por petición.
+- Opcionalmente, un perfilador por muestreo que guarda las pilas de las
+  peticiones lentas en formato "folded" (listo para flamegraph.pl o
+  speedscope) cuando superan un umbral en milisegundos.
+
+Con varios procesos (workers de Gunicorn) cada uno guarda sus métricas en
+un directorio compartido (`METRICS_DIR`) y `/metrics` expone la suma de
+todos; las métricas de un worker que termina se conservan en un archivo
+acumulado, de modo que los contadores no retroceden al reciclarlo.
+
+No requiere dependencias adicionales: las métricas se serializan a mano.
+"""
+
+import copy
+import glob
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+# Límites de los buckets de latencia (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Límites de los buckets de memoria (bytes)
+MEMORY_BUCKETS = tuple(mb * 1024 * 1024 for mb in (64, 128, 256, 384, 512, 768, 1024, 2048))
+
+# Intervalo de muestreo de RSS mientras hay peticiones en curso (segundos)
+RSS_SAMPLE_INTERVAL = 0.01
+
+# Intervalo de muestreo del perfilador (segundos)
+PROFILER_SAMPLE_INTERVAL = 0.005
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_bytes():
+    """
+    Memoria residente actual del proceso en bytes.
+
+    Usa /proc/self/statm cuando está disponible; en otros sistemas cae al
+    pico histórico informado por getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Pico de memoria residente del proceso desde su inicio, en bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB, macOS informa bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ---------------------------------------------------------------------------
+# Métricas en formato Prometheus
+# ---------------------------------------------------------------------------
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base de las métricas: nombre, ayuda y valores por combinación de etiquetas."""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def expose(self):
+        """Líneas de texto en formato de exposición de Prometheus."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._expose_sample(dict(zip(self.label_names, key)), value))
+        return lines
+
+    def _expose_sample(self, labels, value):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+    @staticmethod
+    def _copy_value(value):
+        return value
+
+    @staticmethod
+    def _add_values(current, value):
+        return current + value
+
+    def snapshot(self):
+        """Valores actuales como lista serializable de [etiquetas, valor]."""
+        with self._lock:
+            return [[list(key), self._copy_value(value)] for key, value in self._values.items()]
+
+    def merged(self, snapshots):
+        """
+        Copia de la métrica con la suma de varios snapshots.
+
+        Args:
+            snapshots: Listas devueltas por `snapshot` (de distintos procesos)
+
+        Returns:
+            Metric: Métrica nueva con los valores combinados
+        """
+        result = self._empty_copy()
+        for items in snapshots:
+            for key, value in items:
+                key = tuple(key)
+                current = result._values.get(key)
+                result._values[key] = (self._copy_value(value) if current is None
+                                       else self._add_values(current, value))
+        return result
+
+    def _empty_copy(self):
+        result = copy.copy(self)
+        result._values = {}
+        result._lock = threading.Lock()
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class CounterMetric(Metric):
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class GaugeMetric(Metric):
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class HistogramMetric(Metric):
+    metric_type = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'buckets': [0] * len(self.buckets), 'count': 0, 'sum': 0.0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+            state['count'] += 1
+            state['sum'] += value
+
+    def _expose_sample(self, labels, state):
+        lines = []
+        for bound, count in zip(self.buckets, state['buckets']):
+            bucket_labels = dict(labels, le=_format_value(float(bound)))
+            lines.append(f'{self.name}_bucket{_format_labels(bucket_labels)} {count}')
+        lines.append(f'{self.name}_bucket{_format_labels(dict(labels, le="+Inf"))} {state["count"]}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(state["sum"])}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {state["count"]}')
+        return lines
+
+    @staticmethod
+    def _copy_value(state):
+        return {'buckets': list(state['buckets']), 'count': state['count'], 'sum': state['sum']}
+
+    @staticmethod
+    def _add_values(current, state):
+        current['buckets'] = [a + b for a, b in zip(current['buckets'], state['buckets'])]
+        current['count'] += state['count']
+        current['sum'] += state['sum']
+        return current
+
+
+REQUEST_LATENCY = HistogramMetric(
+    'http_request_duration_seconds', 'Duración de las peticiones HTTP', ('endpoint', 'method', 'status'))
+STAGE_LATENCY = HistogramMetric(
+    'processing_stage_duration_seconds', 'Duración de cada etapa del procesamiento', ('stage',))
+REQUESTS_IN_FLIGHT = GaugeMetric(
+    'http_requests_in_flight', 'Peticiones HTTP en curso')
+BYTES_PROCESSED = CounterMetric(
+    'http_request_bytes_processed_total', 'Bytes recibidos en el cuerpo de las peticiones', ('endpoint',))
+REQUEST_PEAK_RSS = HistogramMetric(
+    'http_request_peak_rss_bytes', 'Pico de memoria residente observado durante la petición', ('endpoint',),
+    buckets=MEMORY_BUCKETS)
+PROCESS_RSS = GaugeMetric(
+    'process_resident_memory_bytes', 'Memoria residente actual del proceso', ('pid',))
+PROCESS_PEAK_RSS = GaugeMetric(
+    'process_peak_resident_memory_bytes', 'Pico de memoria residente del proceso desde su inicio', ('pid',))
+
+METRICS = (REQUEST_LATENCY, STAGE_LATENCY, REQUESTS_IN_FLIGHT, BYTES_PROCESSED,
+           REQUEST_PEAK_RSS, PROCESS_RSS, PROCESS_PEAK_RSS)
+
+
+# Archivo del directorio compartido con las métricas de los procesos terminados
+DEAD_PROCESSES_FILE = 'terminados.json'
+
+
+def _update_process_gauges():
+    pid = os.getpid()
+    PROCESS_RSS.set(current_rss_bytes(), pid=pid)
+    PROCESS_PEAK_RSS.set(peak_rss_bytes(), pid=pid)
+
+
+def reset_metrics():
+    """Descarta los valores acumulados (por ejemplo, los heredados del padre tras el fork)."""
+    for metric in METRICS:
+        metric.reset()
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as snapshot_file:
+            return json.load(snapshot_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_snapshot(path, snapshot):
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+    os.replace(temp_path, path)
+
+
+def write_process_metrics(directory):
+    """Guarda las métricas de este proceso en `directory/<pid>.json`."""
+    _update_process_gauges()
+    _write_snapshot(os.path.join(directory, f'{os.getpid()}.json'),
+                    {metric.name: metric.snapshot() for metric in METRICS})
+
+
+def mark_process_dead(directory, pid):
+    """
+    Incorpora las métricas de un proceso terminado al archivo acumulado.
+
+    Los contadores e histogramas se conservan; los gauges (peticiones en
+    curso, memoria) dejan de exponerse. Se llama desde el proceso padre.
+
+    Args:
+        directory: Directorio compartido de métricas
+        pid: Identificador del proceso terminado
+    """
+    path = os.path.join(directory, f'{pid}.json')
+    snapshot = _read_snapshot(path)
+    if not snapshot:
+        return
+    dead_path = os.path.join(directory, DEAD_PROCESSES_FILE)
+    accumulated = _read_snapshot(dead_path)
+    for metric in METRICS:
+        if metric.metric_type == 'gauge':
+            continue
+        snapshots = [accumulated.get(metric.name, []), snapshot.get(metric.name, [])]
+        accumulated[metric.name] = metric.merged(snapshots).snapshot()
+    _write_snapshot(dead_path, accumulated)
+    os.unlink(path)
+
+
+def clear_metrics_dir(directory):
+    """Crea el directorio compartido de métricas y descarta las de una ejecución anterior."""
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.unlink(path)
+
+
+def render_metrics(directory=None):
+    """
+    Serializa todas las métricas en formato de texto de Prometheus.
+
+    Args:
+        directory: Directorio compartido de métricas; si se indica, se
+            exponen las de todos los procesos que escriben en él
+
+    Returns:
+        str: Texto en formato de exposición de Prometheus
+    """
+    if directory is None:
+        _update_process_gauges()
+        metrics = METRICS
+    else:
+        write_process_metrics(directory)
+        snapshots = [_read_snapshot(path) for path in sorted(glob.glob(os.path.join(directory, '*.json')))]
+        metrics = [metric.merged(snapshot.get(metric.name, []) for snapshot in snapshots)
+                   for metric in METRICS]
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Medición de etapas
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def timed(stage):
+    """
+    Mide la duración de un bloque y la registra como etapa.
+
+    Dentro de una petición, la etapa también se agrega a la cabecera
+    `Server-Timing` de la respuesta. Fuera de una petición (scripts,
+    benchmarks) sólo se actualiza el histograma de etapas.
+
+    Args:
+        stage: Nombre de la etapa (letras, dígitos, '_' o '-')
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        if has_request_context():
+            g.setdefault('server_timings', []).append((stage, elapsed))
+
+
+def format_server_timing(timings):
+    """Construye el valor de la cabecera Server-Timing (duraciones en ms)."""
+    return ', '.join(f'{stage};dur={elapsed * 1000:.1f}' for stage, elapsed in timings)
+
+
+# ---------------------------------------------------------------------------
+# Muestreo de memoria y perfilador de peticiones lentas
+# ---------------------------------------------------------------------------
+
+class RssSampler:
+    """
+    Hilo que muestrea la RSS del proceso mientras hay peticiones en curso.
+
+    Cada petición registra un contador propio y recibe el máximo observado
+    durante su vida. Con peticiones concurrentes el valor es el pico del
+    proceso completo en ese intervalo.
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start_request(self):
+        token = object()
+        with self._lock:
+            self._active[token] = current_rss_bytes()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return token
+
+    def finish_request(self, token):
+        rss = current_rss_bytes()
+        with self._lock:
+            peak = max(self._active.pop(token, rss), rss)
+        return peak
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            rss = current_rss_bytes()
+            with self._lock:
+                for token, peak in self._active.items():
+                    if rss > peak:
+                        self._active[token] = rss
+            time.sleep(self.interval)
+
+
+class StackSampler:
+    """
+    Perfilador por muestreo de un hilo: registra periódicamente su pila.
+
+    Las pilas se acumulan en formato "folded" (marcos separados por ';'
+    y la cantidad de muestras), el formato de entrada de flamegraph.pl.
+    """
+
+    def __init__(self, thread_id, interval=PROFILER_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = StackCounter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        """Pilas acumuladas en formato folded, una por línea."""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def _dump_profile(directory, endpoint, elapsed, sampler):
+    os.makedirs(directory, exist_ok=True)
+    filename = f"{time.strftime('%Y%m%d-%H%M%S')}_{endpoint}_{elapsed * 1000:.0f}ms_{os.getpid()}.folded"
+    with open(os.path.join(directory, filename), 'w') as output:
+        output.write(sampler.folded())
+
+
+# ---------------------------------------------------------------------------
+# Integración con Flask
+# ---------------------------------------------------------------------------
+
+def init_instrumentation(app):
+    """
+    Registra los hooks de medición y el endpoint /metrics en la aplicación.
+
+    Configuración (app.config):
+        SLOW_REQUEST_PROFILE_MS: Umbral en ms a partir del cual se guardan
+            las pilas de la petición; 0 desactiva el perfilador
+        PROFILE_FOLDER: Directorio donde se guardan los perfiles
+        METRICS_DIR: Directorio compartido entre procesos para /metrics;
+            None (por defecto) expone sólo las del proceso actual
+    """
+    app.config.setdefault('SLOW_REQUEST_PROFILE_MS', 0)
+    app.config.setdefault('PROFILE_FOLDER', 'profiles')
+    app.config.setdefault('METRICS_DIR', None)
+    rss_sampler = RssSampler()
+
+    @app.before_request
+    def start_request_instrumentation():
+        g.request_start = time.perf_counter()
+        g.server_timings = []
+        g.rss_token = rss_sampler.start_request()
+        REQUESTS_IN_FLIGHT.inc()
+        BYTES_PROCESSED.inc(request.content_length or 0, endpoint=request.endpoint or 'desconocido')
+        if app.config['METRICS_DIR'] and request.endpoint != 'metrics':
+            write_process_metrics(app.config['METRICS_DIR'])
+        g.stack_sampler = None
+        if app.config['SLOW_REQUEST_PROFILE_MS'] > 0 and request.endpoint != 'metrics':
+            g.stack_sampler = StackSampler(threading.get_ident()).start()
+
+    @app.after_request
+    def add_server_timing(response):
+        g.response_status = response.status_code
+        if 'request_start' in g:
+            timings = g.server_timings + [('total', time.perf_counter() - g.request_start)]
+            response.headers['Server-Timing'] = format_server_timing(timings)
+        return response
+
+    @app.teardown_request
+    def finish_request_instrumentation(exception=None):
+        if 'request_start' not in g:
+            return
+        elapsed = time.perf_counter() - g.request_start
+        endpoint = request.endpoint or 'desconocido'
+        status = 500 if exception is not None else getattr(g, 'response_status', '')
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_LATENCY.observe(elapsed, endpoint=endpoint, method=request.method, status=status)
+        REQUEST_PEAK_RSS.observe(rss_sampler.finish_request(g.rss_token), endpoint=endpoint)
+
+        if g.stack_sampler is not None:
+            g.stack_sampler.stop()
+            if elapsed * 1000 >= app.config['SLOW_REQUEST_PROFILE_MS']:
+                _dump_profile(app.config['PROFILE_FOLDER'], endpoint, elapsed, g.stack_sampler)
+
+        if app.config['METRICS_DIR']:
+            write_process_metrics(app.config['METRICS_DIR'])
+
+    @app.route('/metrics')
+    def metrics():
+        """Métricas de la aplicación en formato de texto de Prometheus"""
+        return Response(render_metrics(app.config['METRICS_DIR']), mimetype='text/plain; version=0.0.4')
+
+    return app
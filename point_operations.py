@@ -0,0 +1,378 @@
+"""
+Motor de Operaciones Puntuales basado en Tablas de Búsqueda (LUT)
+
+Cada operación puntual (brillo/contraste, logarítmica, exponencial, gamma,
+negativo, ecualización y estiramiento de contraste) se compila a una tabla
+de búsqueda de 256 entradas (imágenes de 8 bits) o 65536 entradas (16 bits).
+
+Una cadena de operaciones se compone en una única LUT por canal, de modo que
+la imagen se recorre una sola vez sin importar cuántas operaciones se apliquen.
+Las operaciones que dependen del histograma (ecualización y estiramiento)
+usan el histograma de cada canal, calculado una sola vez por
+`apply_point_operations` (o recibido ya calculado en `histograms`);
+cuando aparecen después de otras operaciones en la cadena, el histograma
+intermedio se obtiene trasladando las frecuencias a través de la LUT
+acumulada, sin volver a recorrer los píxeles.
+"""
+
+import numpy as np
+
+# Cantidad de niveles según el tipo de dato de la imagen
+LEVELS_BY_DTYPE = {
+    np.dtype(np.uint8): 256,
+    np.dtype(np.uint16): 65536,
+}
+
+
+def levels_for_dtype(dtype):
+    """
+    Devuelve la cantidad de niveles de intensidad para un tipo de dato.
+
+    Args:
+        dtype: Tipo de dato numpy de la imagen (uint8 o uint16)
+
+    Returns:
+        int: 256 para uint8, 65536 para uint16
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in LEVELS_BY_DTYPE:
+        raise ValueError(f"Tipo de dato no soportado: {dtype}. Use uint8 o uint16")
+    return LEVELS_BY_DTYPE[dtype]
+
+
+def _lut_dtype(levels):
+    """Tipo de dato de la LUT según la cantidad de niveles."""
+    return np.uint8 if levels <= 256 else np.uint16
+
+
+def _float_param(value, description):
+    """Convierte un parámetro a float rechazando valores no numéricos, NaN o infinitos."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{description} debe ser numérico") from None
+    if not np.isfinite(value):
+        raise ValueError(f"{description} debe ser un número finito")
+    return value
+
+
+def _to_lut(values, levels):
+    """Redondea, recorta al rango válido y convierte a entero una LUT flotante."""
+    return np.clip(np.rint(values), 0, levels - 1).astype(_lut_dtype(levels))
+
+
+def compute_histogram(channel_array, levels):
+    """
+    Calcula el histograma completo de un canal entero.
+
+    A diferencia de `np.histogram`, no ordena ni compara contra bordes de
+    bins, y sirve también para imágenes de 16 bits (65536 niveles).
+
+    Args:
+        channel_array: Array numpy 2D con los valores del canal
+        levels: Cantidad de niveles (256 o 65536)
+
+    Returns:
+        np.ndarray: Histograma de `levels` posiciones
+    """
+    return np.bincount(channel_array.ravel(), minlength=levels)
+
+
+def histogram_statistics(histogram):
+    """
+    Calcula las estadísticas de un canal a partir de su histograma.
+
+    Recorre sólo los `levels` bins en lugar de todos los píxeles, y acepta
+    histogramas apilados (por ejemplo, forma (3, 256) para los tres canales
+    de un frame): las estadísticas se calculan sobre el último eje.
+
+    Args:
+        histogram: Array numpy con el histograma (último eje = niveles)
+
+    Returns:
+        dict: 'pixeles', 'minimo', 'maximo', 'promedio', 'varianza' y 'moda'
+            (escalares o arrays con la forma de los ejes restantes)
+    """
+    histogram = np.asarray(histogram)
+    values = np.arange(histogram.shape[-1], dtype=np.float64)
+    occupied = histogram > 0
+    count = histogram.sum(axis=-1)
+    mean = histogram @ values / count
+    variance = histogram @ (values ** 2) / count - mean ** 2
+    return {
+        'pixeles': count,
+        'minimo': np.argmax(occupied, axis=-1),
+        'maximo': histogram.shape[-1] - 1 - np.argmax(occupied[..., ::-1], axis=-1),
+        'promedio': mean,
+        'varianza': np.maximum(variance, 0.0),
+        'moda': np.argmax(histogram, axis=-1),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Constructores de LUT
+#
+# Todos reciben (levels, histogram, **parametros) y devuelven un array de
+# `levels` posiciones. `histogram` sólo es usado por las operaciones que
+# dependen de la distribución de intensidades.
+# ---------------------------------------------------------------------------
+
+def brightness_contrast_lut(levels, histogram=None, brillo=0.0, contraste=1.0):
+    """
+    Ajuste lineal de brillo y contraste: s = contraste * (r - medio) + medio + brillo.
+
+    Args:
+        brillo: Desplazamiento en niveles de intensidad (puede ser negativo)
+        contraste: Factor multiplicativo alrededor del nivel medio
+    """
+    brillo = _float_param(brillo, "El brillo")
+    contraste = _float_param(contraste, "El contraste")
+    r = np.arange(levels, dtype=np.float64)
+    middle = (levels - 1) / 2.0
+    return _to_lut(contraste * (r - middle) + middle + brillo, levels)
+
+
+def log_lut(levels, histogram=None):
+    """
+    Transformación logarítmica: s = c * log(1 + r), con c tal que el máximo se conserva.
+    Expande los tonos oscuros y comprime los claros.
+    """
+    r = np.arange(levels, dtype=np.float64)
+    max_value = levels - 1
+    c = max_value / np.log1p(max_value)
+    return _to_lut(c * np.log1p(r), levels)
+
+
+def exp_lut(levels, histogram=None, base=10.0):
+    """
+    Transformación exponencial normalizada: s = max * (base^(r/max) - 1) / (base - 1).
+    Comprime los tonos oscuros y expande los claros.
+
+    Args:
+        base: Base de la exponencial (mayor que 1)
+    """
+    base = _float_param(base, "La base de la transformación exponencial")
+    if base <= 1.0:
+        raise ValueError("La base de la transformación exponencial debe ser mayor que 1")
+    max_value = levels - 1
+    r = np.arange(levels, dtype=np.float64) / max_value
+    return _to_lut(max_value * (np.power(base, r) - 1.0) / (base - 1.0), levels)
+
+
+def gamma_lut(levels, histogram=None, gamma=1.0):
+    """
+    Corrección gamma: s = max * (r / max) ^ gamma.
+
+    Args:
+        gamma: Exponente (< 1 aclara, > 1 oscurece)
+    """
+    gamma = _float_param(gamma, "El valor de gamma")
+    if gamma <= 0:
+        raise ValueError("El valor de gamma debe ser positivo")
+    max_value = levels - 1
+    r = np.arange(levels, dtype=np.float64) / max_value
+    return _to_lut(max_value * np.power(r, gamma), levels)
+
+
+def negative_lut(levels, histogram=None):
+    """Negativo de la imagen: s = max - r."""
+    return (levels - 1 - np.arange(levels)).astype(_lut_dtype(levels))
+
+
+def equalization_lut(levels, histogram):
+    """
+    Ecualización de histograma a partir de la función de distribución acumulada.
+
+    Args:
+        histogram: Histograma del canal (`levels` posiciones)
+    """
+    cdf = np.cumsum(histogram, dtype=np.float64)
+    total = cdf[-1]
+    nonzero = cdf[cdf > 0]
+    if total == 0 or nonzero.size == 0:
+        return np.arange(levels).astype(_lut_dtype(levels))
+    cdf_min = nonzero[0]
+    if total == cdf_min:
+        # Imagen de un único nivel: no hay rango que redistribuir
+        return np.arange(levels).astype(_lut_dtype(levels))
+    return _to_lut((cdf - cdf_min) / (total - cdf_min) * (levels - 1), levels)
+
+
+def _percentile_from_histogram(histogram, percentile, side):
+    """
+    Nivel de intensidad correspondiente a un percentil del histograma.
+
+    Con side='right' devuelve el primer nivel cuya frecuencia acumulada
+    supera el percentil (límite inferior); con side='left', el primero
+    que lo alcanza (límite superior).
+    """
+    cdf = np.cumsum(histogram, dtype=np.float64)
+    target = cdf[-1] * percentile / 100.0
+    return int(np.searchsorted(cdf, target, side=side))
+
+
+def contrast_stretch_lut(levels, histogram, percentil_inferior=0.0, percentil_superior=100.0):
+    """
+    Estiramiento de contraste: lleva el rango [bajo, alto] a [0, max].
+
+    Los límites se toman de los percentiles del histograma, de modo que
+    con 0 y 100 se usan el mínimo y el máximo del canal.
+
+    Args:
+        histogram: Histograma del canal (`levels` posiciones)
+        percentil_inferior: Percentil que se mapea a 0
+        percentil_superior: Percentil que se mapea al máximo
+    """
+    low_pct = _float_param(percentil_inferior, "El percentil inferior")
+    high_pct = _float_param(percentil_superior, "El percentil superior")
+    if not 0 <= low_pct < high_pct <= 100:
+        raise ValueError("Los percentiles deben cumplir 0 <= inferior < superior <= 100")
+    if np.sum(histogram) == 0:
+        return np.arange(levels).astype(_lut_dtype(levels))
+    low = _percentile_from_histogram(histogram, low_pct, 'right')
+    high = _percentile_from_histogram(histogram, high_pct, 'left')
+    if high <= low:
+        return np.arange(levels).astype(_lut_dtype(levels))
+    r = np.arange(levels, dtype=np.float64)
+    return _to_lut((r - low) / (high - low) * (levels - 1), levels)
+
+
+# Registro de operaciones disponibles: nombre -> (constructor, usa histograma)
+OPERATIONS = {
+    'brillo_contraste': (brightness_contrast_lut, False),
+    'logaritmica': (log_lut, False),
+    'exponencial': (exp_lut, False),
+    'gamma': (gamma_lut, False),
+    'negativo': (negative_lut, False),
+    'ecualizacion': (equalization_lut, True),
+    'estiramiento': (contrast_stretch_lut, True),
+}
+
+
+def build_operation_lut(operation, levels, histogram=None):
+    """
+    Construye la LUT de una operación individual.
+
+    Args:
+        operation: Diccionario con la clave 'operacion' y sus parámetros,
+            por ejemplo {'operacion': 'gamma', 'gamma': 0.5}
+        levels: Cantidad de niveles (256 o 65536)
+        histogram: Histograma del canal, requerido por ecualización y estiramiento
+
+    Returns:
+        np.ndarray: LUT de `levels` posiciones
+    """
+    if not isinstance(operation, dict) or 'operacion' not in operation:
+        raise ValueError("Cada operación debe ser un objeto con la clave 'operacion'")
+    params = dict(operation)
+    name = params.pop('operacion')
+    if name not in OPERATIONS:
+        raise ValueError(f"Operación desconocida: {name}. Disponibles: {', '.join(OPERATIONS)}")
+
+    builder, needs_histogram = OPERATIONS[name]
+    if needs_histogram and histogram is None:
+        raise ValueError(f"La operación '{name}' requiere el histograma del canal")
+    try:
+        return builder(levels, histogram, **params)
+    except TypeError:
+        raise ValueError(f"Parámetros inválidos para la operación '{name}': {', '.join(params)}") from None
+
+
+def compose_luts(operations, levels, histogram=None):
+    """
+    Compone una cadena de operaciones en una única LUT.
+
+    Para las operaciones que dependen del histograma, el histograma
+    intermedio se deriva del original trasladando cada frecuencia a
+    través de la LUT de la operación anterior.
+
+    Args:
+        operations: Lista de operaciones (ver `build_operation_lut`)
+        levels: Cantidad de niveles (256 o 65536)
+        histogram: Histograma original del canal (opcional si ninguna
+            operación lo necesita)
+
+    Returns:
+        np.ndarray: LUT compuesta de `levels` posiciones
+    """
+    lut = np.arange(levels).astype(_lut_dtype(levels))
+    current_histogram = None if histogram is None else np.asarray(histogram, dtype=np.float64)
+
+    for operation in operations:
+        step = build_operation_lut(operation, levels, current_histogram)
+        lut = step[lut]
+        if current_histogram is not None:
+            current_histogram = np.bincount(step, weights=current_histogram, minlength=levels)
+
+    return lut
+
+
+def compile_channel_luts(operations, levels, histograms=None, channels=1):
+    """
+    Compila la cadena de operaciones en una LUT por canal.
+
+    Args:
+        operations: Lista de operaciones
+        levels: Cantidad de niveles (256 o 65536)
+        histograms: Lista con el histograma de cada canal (o None)
+        channels: Número de canales de la imagen
+
+    Returns:
+        np.ndarray: Array (canales, levels) con una LUT por canal
+    """
+    if histograms is not None and len(histograms) != channels:
+        raise ValueError("Se necesita un histograma por canal")
+    return np.stack([
+        compose_luts(operations, levels, None if histograms is None else histograms[c])
+        for c in range(channels)
+    ])
+
+
+def apply_luts(image_array, luts):
+    """
+    Aplica las LUTs compiladas a la imagen en una sola pasada por canal.
+
+    Args:
+        image_array: Array numpy 2D (un canal) o 3D (alto, ancho, canales)
+        luts: Array (canales, levels) devuelto por `compile_channel_luts`
+
+    Returns:
+        np.ndarray: Imagen transformada con el mismo tipo de dato
+    """
+    if image_array.ndim == 2:
+        return np.take(luts[0], image_array)
+
+    result = np.empty_like(image_array)
+    for c in range(image_array.shape[2]):
+        np.take(luts[c], image_array[:, :, c], out=result[:, :, c])
+    return result
+
+
+def apply_point_operations(image_array, operations, histograms=None):
+    """
+    Compila y aplica una cadena de operaciones puntuales a una imagen.
+
+    Args:
+        image_array: Array numpy uint8 o uint16, 2D o 3D
+        operations: Lista de operaciones
+        histograms: Histogramas por canal; si faltan y alguna operación
+            los requiere, se calculan a partir de la imagen
+
+    Returns:
+        np.ndarray: Imagen transformada
+    """
+    levels = levels_for_dtype(image_array.dtype)
+    channels = 1 if image_array.ndim == 2 else image_array.shape[2]
+
+    needs_histogram = any(
+        OPERATIONS.get(op.get('operacion'), (None, False))[1]
+        for op in operations if isinstance(op, dict)
+    )
+    if needs_histogram and histograms is None:
+        if channels == 1:
+            histograms = [compute_histogram(image_array, levels)]
+        else:
+            histograms = [compute_histogram(image_array[:, :, c], levels) for c in range(channels)]
+
+    luts = compile_channel_luts(operations, levels, histograms, channels)
+    return apply_luts(image_array, luts)
@@ -0,0 +1,384 @@
+"""
+Pipeline de Vista Previa Progresiva Multirresolución
+
+Para cada imagen cargada se construye en memoria una pirámide de
+resoluciones (cada nivel tiene la mitad de ancho y alto que el anterior).
+Una cadena de operaciones (puntuales y filtros) se ejecuta primero sobre un
+nivel reducido para devolver una vista previa inmediata y luego sobre el
+nivel 0 (resolución completa).
+
+Por cada nivel se guardan dos prefijos de la cadena: hasta el último filtro
+espacial (el tramo costoso, que se reutiliza mientras se mueven los
+controles de intensidad) y la cadena sin su último paso (si el usuario sólo
+modifica la última operación, únicamente se recalcula ese paso). Las
+operaciones puntuales consecutivas se componen en una única LUT.
+
+La memoria de la caché se limita en bytes (pirámides más prefijos); al
+superarse se descartan las sesiones usadas hace más tiempo. Las sesiones se
+construyen recién en el primer render: al cargar una imagen sólo se guarda
+el archivo original.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from point_operations import apply_point_operations
+from spatial_filters import MAX_RADIUS, MAX_SIGMA, apply_filter
+
+# Lado máximo (en píxeles) del nivel más chico de la pirámide
+MIN_PYRAMID_SIDE = 128
+
+# Lado máximo del nivel usado por defecto para la vista previa
+PREVIEW_MAX_SIDE = 512
+
+# Memoria máxima de la caché (pirámides y prefijos de todas las sesiones)
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Imágenes originales que se conservan en disco (compartidas entre workers)
+MAX_STORED_SESSIONS = 32
+
+
+def downsample(image):
+    """
+    Reduce la imagen a la mitad promediando bloques de 2x2 píxeles.
+
+    Si el alto o el ancho son impares se descarta la última fila o columna.
+
+    Args:
+        image: Array numpy 2D o 3D (uint8 o uint16)
+
+    Returns:
+        np.ndarray: Imagen reducida con el mismo tipo de dato
+    """
+    height, width = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    cropped = image[:height, :width].astype(np.float32)
+    blocks = (cropped[0::2, 0::2] + cropped[1::2, 0::2] + cropped[0::2, 1::2] + cropped[1::2, 1::2]) / 4.0
+    return np.rint(blocks).astype(image.dtype)
+
+
+def build_pyramid(image, min_side=MIN_PYRAMID_SIDE):
+    """
+    Construye la pirámide de resoluciones de una imagen.
+
+    Args:
+        image: Array numpy 2D o 3D
+        min_side: Se deja de reducir cuando el lado mayor es <= min_side
+
+    Returns:
+        list: Niveles de la pirámide; el nivel 0 es la imagen original
+    """
+    levels = [image]
+    while max(levels[-1].shape[:2]) > min_side and min(levels[-1].shape[:2]) >= 2:
+        levels.append(downsample(levels[-1]))
+    return levels
+
+
+def is_point_operation(step):
+    """Indica si un paso de la cadena es una operación puntual (LUT)."""
+    return 'operacion' in step
+
+
+def scale_step(step, level):
+    """
+    Adapta los parámetros espaciales de un filtro al nivel de la pirámide.
+
+    En el nivel k la imagen es 2^k veces más chica, por lo que el radio y
+    sigma se dividen por 2^k para que la vista previa se parezca al
+    resultado en resolución completa.
+    """
+    if level == 0 or 'filtro' not in step:
+        return step
+    factor = 2 ** level
+    scaled = dict(step)
+    if 'radio' in scaled:
+        scaled['radio'] = max(1, int(round(float(scaled['radio']) / factor)))
+    if 'sigma' in scaled:
+        scaled['sigma'] = max(0.5, float(scaled['sigma']) / factor)
+    return scaled
+
+
+def _check_spatial_param(step, name, low, high, low_inclusive=True):
+    """Valida un parámetro espacial (finito y dentro del rango) antes de escalarlo."""
+    try:
+        value = float(step[name])
+    except (TypeError, ValueError):
+        raise ValueError(f"El parámetro '{name}' debe ser numérico") from None
+    above_low = value >= low if low_inclusive else value > low
+    if not (np.isfinite(value) and above_low and value <= high):
+        raise ValueError(f"El parámetro '{name}' debe ser un número finito entre {low:g} y {high:g}")
+
+
+def validate_steps(steps):
+    """
+    Verifica que cada paso sea una operación puntual o un filtro, y que el
+    radio y sigma de los filtros sean válidos (antes de escalarlos por nivel).
+
+    Args:
+        steps: Lista de diccionarios con la clave 'operacion' o 'filtro'
+    """
+    for step in steps:
+        if not isinstance(step, dict) or ('operacion' in step) == ('filtro' in step):
+            raise ValueError("Cada paso debe tener exactamente una de las claves 'operacion' o 'filtro'")
+        if 'filtro' in step:
+            if 'radio' in step:
+                _check_spatial_param(step, 'radio', 1, MAX_RADIUS)
+            if 'sigma' in step:
+                _check_spatial_param(step, 'sigma', 0, MAX_SIGMA, low_inclusive=False)
+
+
+def _segments(steps, start):
+    """
+    Agrupa los pasos pendientes (desde `start`) en tramos a ejecutar de una vez.
+
+    Las operaciones puntuales consecutivas forman un solo tramo (una LUT)
+    y cada filtro es un tramo propio. Siempre se corta antes del último
+    paso, para que el prefijo sin él quede en caché y cambiar sólo la
+    última operación sea barato.
+    """
+    segments = []
+    i = start
+    last = len(steps) - 1
+    while i < len(steps):
+        j = i + 1
+        if is_point_operation(steps[i]):
+            while j < len(steps) and j != last and is_point_operation(steps[j]):
+                j += 1
+        segments.append((i, j))
+        i = j
+    return segments
+
+
+class PreviewSession:
+    """
+    Pirámide de una imagen cargada y prefijos calculados de cada nivel.
+
+    Por nivel se guardan a lo sumo dos resultados: el de la cadena hasta su
+    último filtro espacial ('filtro'), que se reutiliza mientras se mueven
+    los controles de intensidad posteriores, y el de la cadena sin su
+    último paso ('sin_ultimo'), que se reutiliza mientras se mueve el
+    último control. Así la memoria de la sesión queda acotada a unas tres
+    veces la de la pirámide, y el nivel 0 sólo ocupa memoria si se pidió.
+    """
+
+    def __init__(self, image):
+        self.pyramid = build_pyramid(image)
+        self._prefixes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def level_sizes(self):
+        """Lista de (ancho, alto) de cada nivel."""
+        return [(level.shape[1], level.shape[0]) for level in self.pyramid]
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por la pirámide y los prefijos guardados."""
+        with self._lock:
+            prefixes = sum(result.nbytes for entries in self._prefixes.values()
+                           for _, _, result in entries.values())
+        return sum(level.nbytes for level in self.pyramid) + prefixes
+
+    def clear_prefixes(self):
+        """Descarta los prefijos guardados (la pirámide se conserva)."""
+        with self._lock:
+            self._prefixes.clear()
+
+    def preview_level(self, max_side=PREVIEW_MAX_SIDE):
+        """Primer nivel cuyo lado mayor no supera `max_side`."""
+        for index, level in enumerate(self.pyramid):
+            if max(level.shape[:2]) <= max_side:
+                return index
+        return len(self.pyramid) - 1
+
+    @staticmethod
+    def _key(steps):
+        return json.dumps(steps, sort_keys=True)
+
+    def _cached_prefix(self, level, steps):
+        """Devuelve (largo, resultado) del prefijo guardado más largo de `steps`."""
+        with self._lock:
+            entries = list(self._prefixes.get(level, {}).values())
+        best = (0, self.pyramid[level])
+        for length, key, result in entries:
+            if best[0] < length <= len(steps) and self._key(steps[:length]) == key:
+                best = (length, result)
+        return best
+
+    def _store_prefix(self, level, kind, steps, length, result):
+        with self._lock:
+            entries = self._prefixes.setdefault(level, {})
+            entries[kind] = (length, self._key(steps[:length]), result)
+            # El filtro sólo se recalcula si cambió: el prefijo 'sin_ultimo'
+            # anterior es de otra cadena (o coincide con éste)
+            if kind == 'filtro':
+                entries.pop('sin_ultimo', None)
+
+    def render(self, steps, level=0):
+        """
+        Ejecuta la cadena sobre un nivel reutilizando el prefijo guardado.
+
+        Args:
+            steps: Lista de pasos (operaciones puntuales y/o filtros)
+            level: Nivel de la pirámide (0 = resolución completa)
+
+        Returns:
+            np.ndarray: Imagen resultante en ese nivel
+        """
+        validate_steps(steps)
+        if not 0 <= level < len(self.pyramid):
+            raise ValueError(f"Nivel inválido: {level}. Disponibles: 0 a {len(self.pyramid) - 1}")
+
+        last_filter_end = max((index + 1 for index, step in enumerate(steps)
+                               if not is_point_operation(step)), default=0)
+        start, result = self._cached_prefix(level, steps)
+        for seg_start, seg_end in _segments(steps, start):
+            segment = [scale_step(step, level) for step in steps[seg_start:seg_end]]
+            if is_point_operation(segment[0]):
+                result = apply_point_operations(result, segment)
+            else:
+                result = apply_filter(result, segment[0])
+            if seg_end == last_filter_end:
+                self._store_prefix(level, 'filtro', steps, seg_end, result)
+            elif seg_end == len(steps) - 1:
+                self._store_prefix(level, 'sin_ultimo', steps, seg_end, result)
+
+        return result
+
+
+class PreviewCache:
+    """
+    Sesiones de vista previa por identificador de carga, con descarte LRU.
+
+    La memoria total de las sesiones se limita a `max_bytes`; al superarse
+    se descartan las usadas hace más tiempo (la sesión en uso se conserva,
+    a lo sumo sin sus prefijos).
+
+    Si se indica `storage_dir`, `register` guarda allí el archivo original
+    (tal como fue cargado, sin decodificarlo) y la sesión se construye con
+    `loader` en el primer `get`. Así la carga no paga la pirámide si nadie
+    abre los ajustes, y con varios procesos (workers) cualquiera de ellos
+    puede atender la sesión.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_CACHE_BYTES, storage_dir=None, loader=None,
+                 max_stored=MAX_STORED_SESSIONS):
+        self.max_bytes = max_bytes
+        self.storage_dir = storage_dir
+        self.loader = loader
+        self.max_stored = max_stored
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+    def _stored_path(self, session_id):
+        """Ruta del archivo original de la sesión, o None si no existe."""
+        prefix = f"preview_{session_id}."
+        for entry in os.scandir(self.storage_dir):
+            if entry.name.startswith(prefix):
+                return entry.path
+        return None
+
+    def _prune_stored(self):
+        """Descarta del disco los originales más antiguos."""
+        stored = sorted(
+            (entry for entry in os.scandir(self.storage_dir) if entry.name.startswith('preview_')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in stored[:max(0, len(stored) - self.max_stored)]:
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass  # Otro worker ya lo eliminó
+
+    def _add(self, session_id, session):
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+        self.trim()
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por todas las sesiones."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+        return sum(session.nbytes for session in sessions)
+
+    def trim(self):
+        """Descarta sesiones (de la menos usada a la más usada) hasta entrar en `max_bytes`."""
+        with self._lock:
+            sessions = list(self._sessions.items())
+        total = sum(session.nbytes for _, session in sessions)
+        for session_id, session in sessions[:-1]:
+            if total <= self.max_bytes:
+                return
+            with self._lock:
+                self._sessions.pop(session_id, None)
+            total -= session.nbytes
+        if total > self.max_bytes and sessions:
+            sessions[-1][1].clear_prefixes()
+
+    def register(self, image_path):
+        """
+        Registra una imagen ya guardada en disco sin decodificarla.
+
+        El archivo se mueve a `storage_dir`; la pirámide se construye en el
+        primer `get`. Sin `storage_dir` la sesión se construye en el momento.
+
+        Returns:
+            str: Identificador de la sesión
+        """
+        session_id = uuid.uuid4().hex
+        if not self.storage_dir:
+            self._add(session_id, PreviewSession(self.loader(image_path)))
+            return session_id
+        extension = os.path.splitext(image_path)[1] or '.img'
+        shutil.move(image_path, os.path.join(self.storage_dir, f"preview_{session_id}{extension}"))
+        self._prune_stored()
+        return session_id
+
+    def get(self, session_id):
+        """Devuelve la sesión (construyéndola si hace falta) o None si no existe."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+
+        if not self.storage_dir or not session_id.isalnum():
+            return None
+        path = self._stored_path(session_id)
+        if path is None:
+            return None
+        try:
+            session = PreviewSession(self.loader(path))
+        except (FileNotFoundError, OSError, ValueError):
+            return None  # Descartado por otro worker o archivo ilegible
+        self._add(session_id, session)
+        return session
+
+    def render(self, session_id, steps, level=None):
+        """
+        Ejecuta una cadena sobre una sesión y mantiene la caché dentro del límite.
+
+        Args:
+            session_id: Identificador devuelto por `register`
+            steps: Lista de pasos
+            level: Nivel de la pirámide; None = nivel de vista previa
+
+        Returns:
+            tuple: (imagen, nivel) o None si la sesión no existe
+        """
+        session = self.get(session_id)
+        if session is None:
+            return None
+        level = session.preview_level() if level is None else level
+        result = session.render(steps, level)
+        self.trim()
+        return result, level
@@ -0,0 +1,702 @@
+"""
+Motor de Filtros Espaciales y Detección de Bordes
+
+Implementa filtros de ruido (media, mediana, gaussiano, Wiener) y detectores
+de bordes (Sobel, Prewitt, Laplaciano, Canny) evitando la convolución
+ingenua píxel a píxel:
+
+- Filtro de media y estadísticas locales (Wiener) mediante imagen integral:
+  el costo por píxel es constante sin importar el radio.
+- Filtro gaussiano y operadores de gradiente con kernels separables:
+  dos pasadas 1D de costo O(k) en lugar de una 2D de costo O(k²).
+- Mediana basada en histograma para imágenes de 8 bits: para cada nivel se
+  cuenta, con la imagen integral, cuántos píxeles de la ventana son menores
+  o iguales, por lo que el costo tampoco depende del radio. Para ventanas
+  pequeñas se usa selección directa sobre la ventana, que es más rápida.
+
+Todas las operaciones se ejecutan por bloques de filas (tiles) en paralelo
+con un pool de hilos. Cada tile toma de la imagen sus filas más el margen
+(halo) que necesita la operación y se rellena por reflexión sólo en los
+bordes de la imagen, de modo que el resultado es idéntico a procesar la
+imagen completa de una vez sin copiarla entera. El tamaño de los tiles se
+acota (MAX_TILE_PIXELS) para que la memoria de trabajo no crezca con la
+imagen.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Límites de los parámetros espaciales (llegan sin filtrar desde la API):
+# el relleno y los kernels crecen con el radio, así que se rechazan valores
+# mayores y, además, el radio efectivo se recorta al tamaño de la imagen
+MAX_RADIUS = 128
+MAX_SIGMA = 32.0
+
+# Filas mínimas por tile: por debajo de esto el costo de coordinación supera la ganancia
+MIN_TILE_ROWS = 64
+
+# Píxeles máximos por tile: los temporales float64 de cada tile ocupan a lo
+# sumo 8 MB, de modo que la memoria de trabajo no crece con la imagen
+MAX_TILE_PIXELS = 1024 * 1024
+
+# Radio a partir del cual la mediana usa el método por histograma
+MEDIAN_HISTOGRAM_MIN_RADIUS = 6
+
+# La mediana por selección directa copia la ventana de cada píxel
+# ((2r+1)² valores): se procesa por bloques de filas de a lo sumo estos bytes
+MEDIAN_WINDOW_MAX_BYTES = 16 * 1024 * 1024
+
+# Radio máximo de la mediana por selección directa (imágenes que no son de
+# 8 bits, sin método por histograma): su costo crece con el área de la ventana
+MEDIAN_WINDOW_MAX_RADIUS = 10
+
+# Coeficientes de luminancia (ITU-R BT.601) para convertir RGB a gris
+LUMINANCE_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+def default_workers():
+    """
+    Cantidad de hilos por defecto: FILTER_WORKERS si está definida (Gunicorn
+    la fija según los workers por núcleo), o uno por núcleo disponible.
+    """
+    return int(os.environ.get('FILTER_WORKERS') or 0) or os.cpu_count() or 1
+
+
+# ---------------------------------------------------------------------------
+# Ejecución por tiles
+# ---------------------------------------------------------------------------
+
+def _row_tiles(height, workers, width=1, halo=0):
+    """
+    Divide `height` filas en bloques contiguos para `workers` hilos.
+
+    Se usan al menos dos tiles por hilo y tantos como hagan falta para no
+    superar MAX_TILE_PIXELS, sin bajar de MIN_TILE_ROWS filas (ni del doble
+    del halo, para que el relleno no domine el costo).
+    """
+    wanted = max(workers * 2, -(-height * width // MAX_TILE_PIXELS))
+    min_rows = max(MIN_TILE_ROWS, 2 * halo)
+    tile_count = max(1, min(wanted, height // min_rows))
+    bounds = np.linspace(0, height, tile_count + 1, dtype=int)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def run_tiled(valid_func, image, halo_y, halo_x, workers=None, out_dtype=None):
+    """
+    Aplica una operación "válida" a la imagen por tiles de filas en paralelo.
+
+    Cada tile recibe sus filas con el halo necesario, rellenadas por
+    reflexión donde caen fuera de la imagen (igual que rellenar la imagen
+    completa); `valid_func` debe devolver únicamente la región interior
+    (sin halo).
+
+    Args:
+        valid_func: Función (tile_rellenado) -> array de salida del tile
+        image: Array numpy 2D
+        halo_y: Margen vertical que necesita la operación
+        halo_x: Margen horizontal que necesita la operación
+        workers: Número de hilos (por defecto uno por núcleo)
+        out_dtype: Tipo de dato de la salida (por defecto float64)
+
+    Returns:
+        np.ndarray: Resultado con la misma forma que `image`
+    """
+    workers = workers or default_workers()
+    height, width = image.shape
+    output = np.empty((height, width), dtype=out_dtype or np.float64)
+
+    def process(bounds):
+        start, end = bounds
+        top, bottom = max(0, start - halo_y), min(height, end + halo_y)
+        pad_rows = (halo_y - (start - top), halo_y - (bottom - end))
+        tile = np.pad(image[top:bottom], (pad_rows, (halo_x, halo_x)), mode='reflect')
+        output[start:end] = valid_func(tile)
+
+    tiles = _row_tiles(height, workers, width, halo_y)
+    if workers == 1 or len(tiles) == 1:
+        for bounds in tiles:
+            process(bounds)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(process, tiles))
+
+    return output
+
+
+# ---------------------------------------------------------------------------
+# Núcleos "válidos": reciben un array ya rellenado y devuelven el interior
+# ---------------------------------------------------------------------------
+
+def _box_sum_valid(padded, ry, rx):
+    """Suma sobre ventanas (2ry+1)x(2rx+1) mediante imagen integral."""
+    if padded.dtype == bool:
+        # Conteos: int32 alcanza para cualquier tile y reduce el tráfico de memoria
+        acc_dtype = np.int32
+    elif np.issubdtype(padded.dtype, np.integer):
+        acc_dtype = np.int64
+    else:
+        acc_dtype = np.float64
+    integral = np.zeros((padded.shape[0] + 1, padded.shape[1] + 1), dtype=acc_dtype)
+    np.cumsum(padded, axis=0, dtype=acc_dtype, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+    wy, wx = 2 * ry + 1, 2 * rx + 1
+    return (integral[wy:, wx:] - integral[:-wy, wx:]
+            - integral[wy:, :-wx] + integral[:-wy, :-wx])
+
+
+def _correlate1d_valid(padded, kernel, axis):
+    """Correlación 1D válida a lo largo de un eje (sumando copias desplazadas)."""
+    size = len(kernel)
+    length = padded.shape[axis] - size + 1
+    output = None
+    for offset, weight in enumerate(kernel):
+        if weight == 0:
+            continue
+        window = padded[offset:offset + length] if axis == 0 else padded[:, offset:offset + length]
+        term = window * weight
+        output = term if output is None else output + term
+    if output is None:
+        shape = list(padded.shape)
+        shape[axis] = length
+        output = np.zeros(shape)
+    return output
+
+
+def _separable_valid(padded, kernel_y, kernel_x):
+    """Correlación 2D separable: primero por columnas y luego por filas."""
+    return _correlate1d_valid(_correlate1d_valid(padded.astype(np.float64), kernel_y, 0), kernel_x, 1)
+
+
+def _median_window_valid(padded, radius, max_bytes=None):
+    """
+    Mediana por selección directa (partition) sobre la ventana de cada píxel.
+
+    Las ventanas se copian por bloques de filas para que la copia no supere
+    `max_bytes` (por defecto MEDIAN_WINDOW_MAX_BYTES), sin importar el
+    radio ni el tamaño del tile.
+    """
+    max_bytes = max_bytes or MEDIAN_WINDOW_MAX_BYTES
+    size = 2 * radius + 1
+    height, width = padded.shape[0] - 2 * radius, padded.shape[1] - 2 * radius
+    middle = size * size // 2
+    row_bytes = width * size * size * padded.itemsize
+    chunk_rows = max(1, max_bytes // row_bytes)
+    output = np.empty((height, width), dtype=padded.dtype)
+    windows = sliding_window_view(padded, (size, size))
+    for start in range(0, height, chunk_rows):
+        end = min(start + chunk_rows, height)
+        # Copia explícita y contigua (con la ventana en el último eje): reshape
+        # puede devolver una vista de sólo lectura, por ejemplo con ancho 1
+        stack = np.array(windows[start:end].reshape(end - start, width, size * size))
+        stack.partition(middle, axis=2)
+        output[start:end] = stack[:, :, middle]
+    return output
+
+
+def _median_histogram_valid(padded, radius):
+    """
+    Mediana por histograma acumulado para enteros de 8 bits.
+
+    Para cada nivel v se cuenta con la imagen integral cuántos píxeles de la
+    ventana son <= v; la mediana es el primer nivel donde ese conteo alcanza
+    la mitad de la ventana.
+    """
+    half = (2 * radius + 1) ** 2 // 2 + 1
+    low, high = int(padded.min()), int(padded.max())
+    median = None
+    for level in range(low, high):
+        below = _box_sum_valid(padded <= level, radius, radius) < half
+        median = below.astype(np.int32) if median is None else median + below
+    if median is None:
+        median = np.zeros((padded.shape[0] - 2 * radius, padded.shape[1] - 2 * radius), dtype=np.int32)
+    return (median + low).astype(padded.dtype)
+
+
+# ---------------------------------------------------------------------------
+# Utilidades
+# ---------------------------------------------------------------------------
+
+def gaussian_kernel(sigma, max_radius=None):
+    """
+    Kernel gaussiano 1D normalizado con radio ceil(3 * sigma).
+
+    Args:
+        sigma: Desviación estándar en píxeles (0 < sigma <= MAX_SIGMA)
+        max_radius: Radio máximo del kernel (por ejemplo, según el tamaño
+            de la imagen); el kernel truncado se vuelve a normalizar
+
+    Returns:
+        np.ndarray: Kernel de longitud 2 * radio + 1
+    """
+    try:
+        sigma = float(sigma)
+    except (TypeError, ValueError):
+        raise ValueError("El valor de sigma debe ser numérico") from None
+    if not 0 < sigma <= MAX_SIGMA:
+        raise ValueError(f"El valor de sigma debe ser positivo y no mayor a {MAX_SIGMA:g}")
+    radius = max(1, int(np.ceil(3 * sigma)))
+    if max_radius is not None:
+        radius = min(radius, max_radius)
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    kernel = np.exp(-(x ** 2) / (2 * sigma ** 2))
+    return kernel / kernel.sum()
+
+
+def to_grayscale(image):
+    """
+    Convierte una imagen RGB (alto, ancho, 3) a escala de grises en float64.
+
+    Acumula canal por canal para no copiar la imagen completa a float64; una
+    imagen 2D que ya es float64 se devuelve sin copiar.
+    """
+    if image.ndim == 2:
+        return image.astype(np.float64, copy=False)
+    gray = np.multiply(image[:, :, 0], LUMINANCE_WEIGHTS[0], dtype=np.float64)
+    term = np.empty_like(gray)
+    for channel in (1, 2):
+        np.multiply(image[:, :, channel], LUMINANCE_WEIGHTS[channel], out=term, dtype=np.float64)
+        gray += term
+    return gray
+
+
+def _cast_like(values, dtype):
+    """
+    Redondea y recorta al rango del tipo entero original.
+
+    Redondea en el lugar: `values` es siempre un resultado temporal.
+    """
+    if np.issubdtype(dtype, np.integer):
+        info = np.iinfo(dtype)
+        np.rint(values, out=values)
+        np.clip(values, info.min, info.max, out=values)
+        return values.astype(dtype)
+    return values.astype(dtype, copy=False)
+
+
+def _max_radius_for(shape):
+    """Radio máximo útil para una imagen: una ventana mayor sólo repite el relleno."""
+    return max(1, max(shape[:2]) - 1)
+
+
+def _validate_radius(radio, shape=None):
+    """
+    Valida el radio recibido y lo recorta al tamaño de la imagen.
+
+    Args:
+        radio: Radio pedido (1 <= radio <= MAX_RADIUS)
+        shape: Forma de la imagen; si se indica, el radio se limita a ella
+
+    Returns:
+        int: Radio efectivo
+    """
+    try:
+        radius = int(radio)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("El radio debe ser un entero") from None
+    if not 1 <= radius <= MAX_RADIUS:
+        raise ValueError(f"El radio debe ser un entero entre 1 y {MAX_RADIUS}")
+    if shape is not None:
+        radius = min(radius, _max_radius_for(shape))
+    return radius
+
+
+def _per_channel(func, image, **kwargs):
+    """Aplica un filtro 2D a cada canal de una imagen 2D o 3D."""
+    if image.ndim == 2:
+        return func(image, **kwargs)
+    return np.stack([func(image[:, :, c], **kwargs) for c in range(image.shape[2])], axis=2)
+
+
+# ---------------------------------------------------------------------------
+# Filtros de ruido
+# ---------------------------------------------------------------------------
+
+def _mean_filter_2d(channel, radio=1, workers=None):
+    radius = _validate_radius(radio, channel.shape)
+    area = (2 * radius + 1) ** 2
+    result = run_tiled(lambda tile: _box_sum_valid(tile, radius, radius) / area,
+                       channel, radius, radius, workers)
+    return _cast_like(result, channel.dtype)
+
+
+def mean_filter(image, radio=1, workers=None):
+    """
+    Filtro de media con ventana (2r+1)x(2r+1) usando imagen integral.
+
+    Args:
+        image: Array numpy 2D o 3D
+        radio: Radio de la ventana
+        workers: Número de hilos
+
+    Returns:
+        np.ndarray: Imagen filtrada con el mismo tipo de dato
+    """
+    return _per_channel(_mean_filter_2d, image, radio=radio, workers=workers)
+
+
+def _median_filter_2d(channel, radio=1, workers=None):
+    radius = _validate_radius(radio, channel.shape)
+    if channel.dtype == np.uint8 and radius >= MEDIAN_HISTOGRAM_MIN_RADIUS:
+        valid_func = lambda tile: _median_histogram_valid(tile, radius)
+    else:
+        if radius > MEDIAN_WINDOW_MAX_RADIUS:
+            raise ValueError(f"Para imágenes que no son de 8 bits el radio de la mediana "
+                             f"debe ser a lo sumo {MEDIAN_WINDOW_MAX_RADIUS}")
+        valid_func = lambda tile: _median_window_valid(tile, radius)
+    return run_tiled(valid_func, channel, radius, radius, workers, out_dtype=channel.dtype)
+
+
+def median_filter(image, radio=1, workers=None):
+    """
+    Filtro de mediana con ventana (2r+1)x(2r+1).
+
+    Para imágenes de 8 bits con radio >= MEDIAN_HISTOGRAM_MIN_RADIUS se usa
+    el método por histograma, cuyo costo no depende del radio. En el resto
+    se seleccionan las ventanas por bloques de filas (memoria acotada por
+    MEDIAN_WINDOW_MAX_BYTES); sin método por histograma (16 bits) el radio
+    se limita a MEDIAN_WINDOW_MAX_RADIUS.
+
+    Args:
+        image: Array numpy 2D o 3D
+        radio: Radio de la ventana
+        workers: Número de hilos
+
+    Returns:
+        np.ndarray: Imagen filtrada con el mismo tipo de dato
+    """
+    return _per_channel(_median_filter_2d, image, radio=radio, workers=workers)
+
+
+def _gaussian_filter_2d(channel, sigma=1.0, workers=None):
+    kernel = gaussian_kernel(sigma, _max_radius_for(channel.shape))
+    radius = len(kernel) // 2
+    result = run_tiled(lambda tile: _separable_valid(tile, kernel, kernel),
+                       channel, radius, radius, workers)
+    return _cast_like(result, channel.dtype)
+
+
+def gaussian_filter(image, sigma=1.0, workers=None):
+    """
+    Filtro gaussiano separable (dos pasadas 1D).
+
+    Args:
+        image: Array numpy 2D o 3D
+        sigma: Desviación estándar del kernel en píxeles
+        workers: Número de hilos
+
+    Returns:
+        np.ndarray: Imagen filtrada con el mismo tipo de dato
+    """
+    return _per_channel(_gaussian_filter_2d, image, sigma=sigma, workers=workers)
+
+
+def _local_statistics_valid(padded, radius):
+    """Media y varianza local por imagen integral."""
+    area = (2 * radius + 1) ** 2
+    values = padded.astype(np.float64)
+    mean = _box_sum_valid(values, radius, radius) / area
+    variance = np.maximum(_box_sum_valid(values * values, radius, radius) / area - mean ** 2, 0)
+    return mean, variance
+
+
+def _wiener_valid(padded, radius, noise):
+    """Filtro de Wiener sobre un tile rellenado con varianza de ruido conocida."""
+    mean, variance = _local_statistics_valid(padded, radius)
+    center = padded[radius:-radius, radius:-radius].astype(np.float64)
+    if noise <= 0:
+        return center
+    gain = np.maximum(variance - noise, 0) / np.maximum(variance, noise)
+    return mean + gain * (center - mean)
+
+
+def _wiener_filter_2d(channel, radio=2, ruido=None, workers=None):
+    radius = _validate_radius(radio, channel.shape)
+    if ruido is None:
+        # Primera pasada: el ruido se estima como el promedio de la varianza local
+        variance = run_tiled(lambda tile: _local_statistics_valid(tile, radius)[1],
+                             channel, radius, radius, workers)
+        noise = float(np.mean(variance))
+        del variance
+    else:
+        noise = float(ruido)
+    result = run_tiled(lambda tile: _wiener_valid(tile, radius, noise), channel, radius, radius, workers)
+    return _cast_like(result, channel.dtype)
+
+
+def wiener_filter(image, radio=2, ruido=None, workers=None):
+    """
+    Filtro de Wiener adaptativo basado en media y varianza locales.
+
+    Args:
+        image: Array numpy 2D o 3D
+        radio: Radio de la ventana
+        ruido: Varianza del ruido; por defecto el promedio de la varianza local
+        workers: Número de hilos
+
+    Returns:
+        np.ndarray: Imagen filtrada con el mismo tipo de dato
+    """
+    return _per_channel(_wiener_filter_2d, image, radio=radio, ruido=ruido, workers=workers)
+
+
+# ---------------------------------------------------------------------------
+# Detección de bordes
+# ---------------------------------------------------------------------------
+
+# Kernels separables (suavizado, derivada) de cada operador de gradiente
+GRADIENT_KERNELS = {
+    'sobel': (np.array([1.0, 2.0, 1.0]), np.array([-1.0, 0.0, 1.0])),
+    'prewitt': (np.array([1.0, 1.0, 1.0]), np.array([-1.0, 0.0, 1.0])),
+}
+
+
+def gradients(image, operator='sobel', workers=None):
+    """
+    Calcula las derivadas horizontal y vertical con un operador separable.
+
+    Args:
+        image: Array numpy 2D o 3D (se convierte a gris)
+        operator: 'sobel' o 'prewitt'
+        workers: Número de hilos
+
+    Returns:
+        tuple: (gx, gy) como arrays float64
+    """
+    smooth, derivative = GRADIENT_KERNELS[operator]
+    gray = to_grayscale(image)
+    gx = run_tiled(lambda tile: _separable_valid(tile, smooth, derivative), gray, 1, 1, workers)
+    gy = run_tiled(lambda tile: _separable_valid(tile, derivative, smooth), gray, 1, 1, workers)
+    return gx, gy
+
+
+def sobel(image, workers=None):
+    """Magnitud del gradiente con el operador de Sobel."""
+    gx, gy = gradients(image, 'sobel', workers)
+    return np.hypot(gx, gy, out=gx)
+
+
+def prewitt(image, workers=None):
+    """Magnitud del gradiente con el operador de Prewitt."""
+    gx, gy = gradients(image, 'prewitt', workers)
+    return np.hypot(gx, gy, out=gx)
+
+
+def _laplacian_valid(padded):
+    second = np.array([1.0, -2.0, 1.0])
+    values = padded.astype(np.float64)
+    return _correlate1d_valid(values[1:-1], second, 1) + _correlate1d_valid(values[:, 1:-1], second, 0)
+
+
+def laplacian(image, workers=None):
+    """
+    Operador Laplaciano (kernel de 4 vecinos) como suma de dos segundas derivadas 1D.
+
+    Returns:
+        np.ndarray: Valor absoluto de la respuesta en float64
+    """
+    response = run_tiled(_laplacian_valid, to_grayscale(image), 1, 1, workers)
+    return np.abs(response, out=response)
+
+
+def _gradient_angle(gx, gy, out=None):
+    """Dirección del gradiente en grados, en el rango [0, 180)."""
+    angle = np.arctan2(gy, gx, out=out)
+    np.rad2deg(angle, out=angle)
+    angle += 180.0
+    return np.remainder(angle, 180.0, out=angle)
+
+
+def _non_maximum_suppression(magnitude, angle):
+    """
+    Conserva sólo los máximos locales en la dirección del gradiente.
+
+    Anula los demás píxeles de `magnitude` en el lugar y la devuelve.
+
+    Args:
+        magnitude: Magnitud del gradiente (se modifica)
+        angle: Dirección del gradiente en grados (ver `_gradient_angle`)
+    """
+    padded = np.pad(magnitude, 1, mode='constant')
+    height, width = magnitude.shape
+
+    def neighbor(dy, dx):
+        return padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+
+    # Direcciones cuantizadas: 0°, 45°, 90° y 135°
+    directions = [
+        ((angle < 22.5) | (angle >= 157.5), (0, 1)),
+        ((angle >= 22.5) & (angle < 67.5), (1, 1)),
+        ((angle >= 67.5) & (angle < 112.5), (1, 0)),
+        ((angle >= 112.5) & (angle < 157.5), (1, -1)),
+    ]
+    keep = np.zeros_like(magnitude, dtype=bool)
+    for mask, (dy, dx) in directions:
+        keep |= mask & (magnitude >= neighbor(dy, dx)) & (magnitude >= neighbor(-dy, -dx))
+    del padded, angle, directions
+    magnitude[~keep] = 0.0
+    return magnitude
+
+
+def _label_components(mask):
+    """
+    Etiqueta las componentes 8-conexas de una máscara sin recorrer píxel a píxel.
+
+    Union-find vectorizado sobre los píxeles activos: en cada ronda cada par
+    de vecinos con raíces distintas cuelga la raíz mayor de la menor y luego
+    se comprimen los caminos (parent = parent[parent]) hasta que todos
+    apuntan a su raíz. Las rondas terminan cuando ningún par de vecinos
+    tiene raíces distintas.
+
+    Returns:
+        tuple: (índices planos de los píxeles activos, raíz de cada uno)
+    """
+    flat = np.flatnonzero(mask)
+    # int32 alcanza para cualquier imagen aceptada y reduce a la mitad los pares
+    index_dtype = np.int32 if len(flat) < 2 ** 31 else np.int64
+    index = np.full(mask.shape, -1, dtype=index_dtype)
+    index.ravel()[flat] = np.arange(len(flat), dtype=index_dtype)
+
+    # Pares de vecinos: derecha, abajo, abajo-derecha y abajo-izquierda
+    first, second = [], []
+    for a, b in ((index[:, :-1], index[:, 1:]), (index[:-1, :], index[1:, :]),
+                 (index[:-1, :-1], index[1:, 1:]), (index[:-1, 1:], index[1:, :-1])):
+        linked = (a >= 0) & (b >= 0)
+        first.append(a[linked])
+        second.append(b[linked])
+    first, second = np.concatenate(first), np.concatenate(second)
+
+    del index
+    parent = np.arange(len(flat), dtype=index_dtype)
+    while True:
+        root_a, root_b = parent[first], parent[second]
+        differ = root_a != root_b
+        if not differ.any():
+            return flat, parent
+        np.minimum.at(parent, np.maximum(root_a, root_b)[differ], np.minimum(root_a, root_b)[differ])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def _hysteresis(strong, weak):
+    """
+    Conserva los bordes débiles conectados (8-vecinos) a algún borde fuerte.
+
+    Equivale a recorrer los bordes desde cada píxel fuerte: se etiquetan las
+    componentes de `weak | strong` y se conservan las que contienen un
+    píxel fuerte.
+    """
+    flat, roots = _label_components(weak | strong)
+    has_strong = np.zeros(len(flat), dtype=bool)
+    has_strong[roots[strong.ravel()[flat]]] = True
+    edges = np.zeros(strong.shape, dtype=bool)
+    edges.ravel()[flat[has_strong[roots]]] = True
+    return edges
+
+
+def canny(image, sigma=1.4, umbral_bajo=None, umbral_alto=None, workers=None):
+    """
+    Detector de bordes de Canny.
+
+    Suavizado gaussiano separable, gradiente de Sobel, supresión de no
+    máximos y umbralización por histéresis.
+
+    Args:
+        image: Array numpy 2D o 3D (se convierte a gris)
+        sigma: Desviación estándar del suavizado
+        umbral_bajo: Umbral débil; por defecto 10% del máximo del gradiente
+        umbral_alto: Umbral fuerte; por defecto 20% del máximo del gradiente
+        workers: Número de hilos
+
+    Returns:
+        np.ndarray: Mapa binario de bordes en uint8 (0 o 255)
+    """
+    smoothed = _gaussian_filter_2d(to_grayscale(image), sigma=sigma, workers=workers)
+    gx, gy = gradients(smoothed, 'sobel', workers)
+    del smoothed
+    magnitude = np.hypot(gx, gy)
+    # La dirección reutiliza la memoria de gy
+    angle = _gradient_angle(gx, gy, out=gy)
+    del gx, gy
+    magnitude = _non_maximum_suppression(magnitude, angle)
+    del angle
+
+    peak = float(magnitude.max())
+    high = 0.2 * peak if umbral_alto is None else float(umbral_alto)
+    low = 0.1 * peak if umbral_bajo is None else float(umbral_bajo)
+    if low > high:
+        raise ValueError("El umbral bajo no puede superar al umbral alto")
+
+    strong = magnitude >= high
+    weak = (magnitude >= low) & ~strong
+    if peak == 0:
+        strong[:] = False
+    return _hysteresis(strong, weak).astype(np.uint8) * 255
+
+
+# Registros de filtros y detectores disponibles (nombre en la API -> función)
+FILTERS = {
+    'media': mean_filter,
+    'mediana': median_filter,
+    'gaussiano': gaussian_filter,
+    'wiener': wiener_filter,
+}
+
+EDGE_DETECTORS = {
+    'sobel': sobel,
+    'prewitt': prewitt,
+    'laplaciano': laplacian,
+    'canny': canny,
+}
+
+
+def edges_to_uint8(response):
+    """Normaliza una respuesta de bordes al rango 0-255 (escala `response` en el lugar)."""
+    if response.dtype == np.uint8:
+        return response
+    peak = float(response.max())
+    if peak == 0:
+        return np.zeros(response.shape, dtype=np.uint8)
+    # Escala en el lugar: la respuesta es siempre un resultado temporal
+    response *= 255.0 / peak
+    np.rint(response, out=response)
+    np.clip(response, 0, 255, out=response)
+    return response.astype(np.uint8)
+
+
+def apply_filter(image, operation):
+    """
+    Aplica un filtro o detector de bordes descrito por un diccionario.
+
+    Args:
+        image: Array numpy 2D o 3D
+        operation: Diccionario con la clave 'filtro' y sus parámetros,
+            por ejemplo {'filtro': 'gaussiano', 'sigma': 2}
+
+    Returns:
+        np.ndarray: Imagen filtrada (filtros) o mapa de bordes uint8 (detectores)
+    """
+    if not isinstance(operation, dict) or 'filtro' not in operation:
+        raise ValueError("Cada filtro debe ser un objeto con la clave 'filtro'")
+    params = dict(operation)
+    name = params.pop('filtro')
+    params.pop('workers', None)
+
+    if name in FILTERS:
+        func, is_edge = FILTERS[name], False
+    elif name in EDGE_DETECTORS:
+        func, is_edge = EDGE_DETECTORS[name], True
+    else:
+        available = ', '.join(list(FILTERS) + list(EDGE_DETECTORS))
+        raise ValueError(f"Filtro desconocido: {name}. Disponibles: {available}")
+
+    try:
+        result = func(image, **params)
+    except TypeError:
+        raise ValueError(f"Parámetros inválidos para el filtro '{name}': {', '.join(params)}") from None
+    return edges_to_uint8(result) if is_edge else result
@@ -3,18 +3,41 @@
 Prueba de Detección de Personas en Imagen
 
 Script simple para probar YOLOv8 con una imagen estática.
+
+Con --inference-url (o la variable INFERENCE_SERVICE_URL) usa el servicio de
+inferencia compartido en lugar de cargar el modelo en este proceso.
 """
 
-from ultralytics import YOLO
+import argparse
 import cv2
 import os
 
-def test_yolo_with_image(image_path='input/test_image.jpg'):
+from inference_service import InferenceClient, results_to_detections, service_url_from_env
+
+def draw_detections(img, detections):
+    """
+    Dibuja las cajas y etiquetas de las detecciones sobre una copia de la imagen.
+    
+    Args:
+        img: Imagen BGR
+        detections (list): Detecciones (formato de `results_to_detections`)
+    """
+    annotated_img = img.copy()
+    for detection in detections:
+        x1, y1, x2, y2 = map(int, detection['caja'])
+        label = f"{detection['clase']} {detection['confianza']:.2f}"
+        cv2.rectangle(annotated_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(annotated_img, label, (x1, max(15, y1 - 5)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+    return annotated_img
+
+def test_yolo_with_image(image_path='input/test_image.jpg', inference_url=None):
     """
     Prueba YOLOv8 con una imagen estática.
     
     Args:
         image_path (str): Ruta a la imagen de prueba
+        inference_url (str): URL del servicio de inferencia (None = modelo local)
     """
     print("🔍 Probando YOLOv8 con imagen de prueba...")
     print("=" * 50)
@@ -24,11 +47,6 @@ def test_yolo_with_image(image_path='input/test_image.jpg'):
         print(f"❌ Error: No se encontró la imagen {image_path}")
         return
     
-    # Cargar modelo YOLOv8
-    print("🔄 Cargando modelo YOLOv8n...")
-    model = YOLO('yolov8n.pt')
-    print("✅ Modelo cargado exitosamente")
-    
     # Cargar imagen
     print(f"📸 Cargando imagen: {image_path}")
     img = cv2.imread(image_path)
@@ -39,29 +57,38 @@ def test_yolo_with_image(image_path='input/test_image.jpg'):
     height, width = img.shape[:2]
     print(f"📊 Resolución de imagen: {width}x{height}")
     
-    # Ejecutar detección
-    print("🚀 Ejecutando detección...")
-    results = model(img, conf=0.3)  # Confianza baja para detectar más objetos
+    # Ejecutar detección (confianza baja para detectar más objetos)
+    if inference_url:
+        print(f"🚀 Ejecutando detección con el servicio en {inference_url}...")
+        detections = InferenceClient(inference_url).detect_frame(img, confidence=0.3)
+    else:
+        from ultralytics import YOLO
+        
+        # Cargar modelo YOLOv8
+        print("🔄 Cargando modelo YOLOv8n...")
+        model = YOLO('yolov8n.pt')
+        print("✅ Modelo cargado exitosamente")
+        
+        print("🚀 Ejecutando detección...")
+        results = model(img, conf=0.3)
+        detections = results_to_detections(results[0], model.names)
     
     # Analizar resultados
-    result = results[0]
-    
-    total_detections = len(result.boxes) if result.boxes is not None else 0
+    total_detections = len(detections)
     person_detections = 0
     
     print(f"\n📊 RESULTADOS DE DETECCIÓN:")
     print(f"🔍 Detecciones totales: {total_detections}")
     
-    if result.boxes is not None:
-        for i, box in enumerate(result.boxes):
-            class_id = int(box.cls[0])
-            confidence = float(box.conf[0])
-            class_name = model.names[class_id]
-            
-            print(f"  {i+1}. Clase: {class_name} | Confianza: {confidence:.3f} | ID: {class_id}")
-            
-            if class_id == 0:  # Persona
-                person_detections += 1
+    for i, detection in enumerate(detections):
+        class_id = detection['clase_id']
+        confidence = detection['confianza']
+        class_name = detection['clase']
+        
+        print(f"  {i+1}. Clase: {class_name} | Confianza: {confidence:.3f} | ID: {class_id}")
+        
+        if class_id == 0:  # Persona
+            person_detections += 1
     
     print(f"\n👥 Personas detectadas: {person_detections}")
     
@@ -71,7 +98,7 @@ def test_yolo_with_image(image_path='input/test_image.jpg'):
         os.makedirs('output', exist_ok=True)
         
         # Dibujar detecciones en la imagen
-        annotated_img = result.plot()
+        annotated_img = draw_detections(img, detections)
         cv2.imwrite(output_path, annotated_img)
         print(f"💾 Imagen con detecciones guardada en: {output_path}")
     else:
@@ -89,4 +116,10 @@ def test_yolo_with_image(image_path='input/test_image.jpg'):
         print("   o prueba el sistema con un video real.")
 
 if __name__ == "__main__":
-    test_yolo_with_image()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Prueba YOLOv8 con una imagen estática")
+    parser.add_argument('--image', '-i', type=str, default='input/test_image.jpg',
+                        help="Ruta a la imagen de prueba (default: input/test_image.jpg)")
+    parser.add_argument('--inference-url', type=str, default=service_url_from_env(),
+                        help="URL del servicio de inferencia compartido (default: INFERENCE_SERVICE_URL)")
+    args = parser.parse_args()
+    test_yolo_with_image(args.image, args.inference_url)
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""Pruebas del batching dinámico del servicio de inferencia con un modelo simulado."""
+
+import threading
+import time
+
+import pytest
+
+from inference_service import DynamicBatcher
+
+
+def detection(confidence):
+    return {'clase_id': 0, 'clase': 'person', 'confianza': confidence, 'caja': [0.0, 0.0, 1.0, 1.0]}
+
+
+class FakePredictor:
+    """Registra los lotes recibidos y devuelve las mismas detecciones para cada imagen."""
+
+    def __init__(self, confidences=(0.9,)):
+        self.confidences = confidences
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, images, confidence):
+        with self.lock:
+            self.calls.append((list(images), confidence))
+        return [[detection(value) for value in self.confidences] for _ in images]
+
+
+def test_batches_never_exceed_max_batch_size():
+    predictor = FakePredictor()
+    batcher = DynamicBatcher(predictor, max_batch_size=3, max_wait_ms=200)
+
+    futures = [batcher.submit(index) for index in range(7)]
+    for future in futures:
+        future.result(timeout=5)
+
+    sizes = [len(images) for images, _ in predictor.calls]
+    assert max(sizes) == 3
+    assert sum(sizes) == 7
+    assert sorted(image for images, _ in predictor.calls for image in images) == list(range(7))
+    assert futures[0].batch_size == 3
+    assert batcher.images_processed == 7
+
+
+def test_wait_window_is_counted_from_first_request():
+    predictor = FakePredictor()
+    batcher = DynamicBatcher(predictor, max_batch_size=8, max_wait_ms=300)
+
+    first = batcher.submit('a')
+    time.sleep(0.15)
+    second = batcher.submit('b')
+    # Vence la ventana de la primera petición aunque 'b' haya llegado hace poco
+    time.sleep(0.3)
+    third = batcher.submit('c')
+    for future in (first, second, third):
+        future.result(timeout=5)
+
+    assert [images for images, _ in predictor.calls] == [['a', 'b'], ['c']]
+    assert first.batch_size == second.batch_size == 2
+    assert third.batch_size == 1
+
+
+def test_confidence_is_filtered_per_request():
+    predictor = FakePredictor(confidences=(0.1, 0.5, 0.9))
+    batcher = DynamicBatcher(predictor, max_batch_size=2, max_wait_ms=1000)
+
+    low = batcher.submit('a', confidence=0.2)
+    high = batcher.submit('b', confidence=0.6)
+
+    assert [d['confianza'] for d in low.result(timeout=5)] == [0.5, 0.9]
+    assert [d['confianza'] for d in high.result(timeout=5)] == [0.9]
+    # El modelo se ejecuta una vez con la confianza más baja del lote
+    assert [confidence for _, confidence in predictor.calls] == [0.2]
+
+
+def test_model_errors_reach_every_request_of_the_batch():
+    def failing_predict(images, confidence):
+        raise ValueError('modelo roto')
+
+    batcher = DynamicBatcher(failing_predict, max_batch_size=2, max_wait_ms=1000)
+    futures = [batcher.submit('a'), batcher.submit('b')]
+
+    for future in futures:
+        with pytest.raises(ValueError, match='modelo roto'):
+            future.result(timeout=5)
+    assert batcher.batches_processed == 0
+
+    # El hilo del batcher sigue atendiendo peticiones después del error
+    batcher.predict_batch = FakePredictor()
+    assert batcher.submit('c').result(timeout=5) == [detection(0.9)]
+
+
+def test_missing_outputs_fail_the_unmatched_requests():
+    def short_predict(images, confidence):
+        return [[detection(0.9)]]
+
+    batcher = DynamicBatcher(short_predict, max_batch_size=2, max_wait_ms=1000)
+    first, second = batcher.submit('a'), batcher.submit('b')
+
+    assert first.result(timeout=5) == [detection(0.9)]
+    with pytest.raises(RuntimeError, match='1 resultados para un lote de 2'):
+        second.result(timeout=5)
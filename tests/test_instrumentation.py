@@ -0,0 +1,59 @@
+"""Pruebas de las métricas compartidas entre procesos."""
+
+import json
+import os
+
+from instrumentation import (
+    DEAD_PROCESSES_FILE,
+    REQUEST_LATENCY,
+    REQUESTS_IN_FLIGHT,
+    mark_process_dead,
+    render_metrics,
+    write_process_metrics,
+)
+
+
+def write_other_process(directory, pid, latency_values, in_flight):
+    """Simula el archivo de métricas de otro worker."""
+    snapshot = {
+        REQUEST_LATENCY.name: [[['upload_image', 'POST', '200'], value] for value in latency_values],
+        REQUESTS_IN_FLIGHT.name: [[[], in_flight]],
+    }
+    with open(os.path.join(directory, f'{pid}.json'), 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file)
+
+
+def latency_state(count):
+    buckets = [count] * len(REQUEST_LATENCY.buckets)
+    return {'buckets': buckets, 'count': count, 'sum': 0.001 * count}
+
+
+def test_render_metrics_sums_all_processes(tmp_path):
+    write_other_process(tmp_path, 101, [latency_state(2)], 1)
+    write_other_process(tmp_path, 102, [latency_state(3)], 0)
+
+    text = render_metrics(str(tmp_path))
+
+    assert 'http_request_duration_seconds_count{endpoint="upload_image",method="POST",status="200"} 5' in text
+    assert f'process_resident_memory_bytes{{pid="{os.getpid()}"}}' in text
+    assert os.path.exists(tmp_path / f'{os.getpid()}.json')
+
+
+def test_dead_process_keeps_counters_and_drops_gauges(tmp_path):
+    write_other_process(tmp_path, 101, [latency_state(2)], 1)
+    mark_process_dead(str(tmp_path), 101)
+    write_other_process(tmp_path, 102, [latency_state(3)], 0)
+    mark_process_dead(str(tmp_path), 102)
+
+    assert sorted(os.listdir(tmp_path)) == [DEAD_PROCESSES_FILE]
+    with open(tmp_path / DEAD_PROCESSES_FILE) as dead_file:
+        accumulated = json.load(dead_file)
+    assert REQUESTS_IN_FLIGHT.name not in accumulated
+    [[labels, state]] = accumulated[REQUEST_LATENCY.name]
+    assert labels == ['upload_image', 'POST', '200']
+    assert state['count'] == 5
+
+
+def test_write_process_metrics_is_atomic(tmp_path):
+    write_process_metrics(str(tmp_path))
+    assert os.listdir(tmp_path) == [f'{os.getpid()}.json']
@@ -0,0 +1,83 @@
+"""Pruebas del motor de operaciones puntuales (LUT)."""
+
+import numpy as np
+import pytest
+
+from point_operations import (
+    apply_point_operations,
+    build_operation_lut,
+    compose_luts,
+    compute_histogram,
+    histogram_statistics,
+)
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+
+
+def apply_sequentially(image_array, operations):
+    """Aplica cada operación por separado, recalculando el histograma de cada paso."""
+    result = image_array
+    for operation in operations:
+        result = apply_point_operations(result, [operation])
+    return result
+
+
+@pytest.mark.parametrize('operations', [
+    [{'operacion': 'gamma', 'gamma': 0.5}, {'operacion': 'negativo'}],
+    [{'operacion': 'brillo_contraste', 'brillo': 20, 'contraste': 1.5}, {'operacion': 'logaritmica'}],
+    [{'operacion': 'gamma', 'gamma': 2.2}, {'operacion': 'ecualizacion'}],
+    [{'operacion': 'negativo'}, {'operacion': 'estiramiento', 'percentil_inferior': 2, 'percentil_superior': 98},
+     {'operacion': 'exponencial'}],
+])
+def test_composed_lut_matches_sequential_application(image, operations):
+    np.testing.assert_array_equal(apply_point_operations(image, operations),
+                                  apply_sequentially(image, operations))
+
+
+def test_equalization_after_gamma_uses_intermediate_histogram(image):
+    channel = image[:, :, 0]
+    gamma = build_operation_lut({'operacion': 'gamma', 'gamma': 3.0}, 256)
+    intermediate = gamma[channel]
+
+    composed = compose_luts([{'operacion': 'gamma', 'gamma': 3.0}, {'operacion': 'ecualizacion'}],
+                            256, compute_histogram(channel, 256))
+    expected = build_operation_lut({'operacion': 'ecualizacion'}, 256, compute_histogram(intermediate, 256))
+
+    np.testing.assert_array_equal(composed[channel], expected[intermediate])
+
+
+def test_uint16_grayscale_keeps_dtype():
+    image = np.arange(0, 65536, 16, dtype=np.uint16).reshape(64, 64)
+    result = apply_point_operations(image, [{'operacion': 'negativo'}])
+    assert result.dtype == np.uint16
+    np.testing.assert_array_equal(result, 65535 - image)
+
+
+def test_unknown_operation_raises_value_error(image):
+    with pytest.raises(ValueError):
+        apply_point_operations(image, [{'operacion': 'inexistente'}])
+
+
+@pytest.mark.parametrize('operation', [
+    {'operacion': 'gamma', 'gamma': 'nan'},
+    {'operacion': 'brillo_contraste', 'contraste': float('nan')},
+    {'operacion': 'brillo_contraste', 'brillo': float('inf')},
+    {'operacion': 'exponencial', 'base': float('inf')},
+    {'operacion': 'estiramiento', 'percentil_superior': float('nan')},
+])
+def test_non_finite_parameters_raise_value_error(image, operation):
+    with pytest.raises(ValueError):
+        apply_point_operations(image, [operation])
+
+
+def test_histogram_statistics_match_numpy(image):
+    channel = image[:, :, 1]
+    stats = histogram_statistics(compute_histogram(channel, 256))
+    assert stats['minimo'] == channel.min()
+    assert stats['maximo'] == channel.max()
+    assert stats['promedio'] == pytest.approx(channel.mean())
+    assert stats['varianza'] == pytest.approx(channel.var())
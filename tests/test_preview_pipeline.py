@@ -0,0 +1,115 @@
+"""Pruebas del pipeline de vista previa progresiva."""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import preview_pipeline
+from point_operations import apply_point_operations
+from preview_pipeline import PreviewCache, PreviewSession, build_pyramid, scale_step
+from spatial_filters import apply_filter
+
+
+@pytest.fixture
+def image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8)
+
+
+def load_png(path):
+    with Image.open(path) as img:
+        return np.array(img.convert('RGB'))
+
+
+def test_pyramid_halves_each_level(image):
+    sizes = [level.shape[:2] for level in build_pyramid(image)]
+    assert sizes == [(300, 400), (150, 200), (75, 100)]
+
+
+def test_render_matches_direct_application(image):
+    steps = [{'filtro': 'media', 'radio': 2}, {'operacion': 'gamma', 'gamma': 0.8},
+             {'operacion': 'ecualizacion'}]
+    expected = apply_point_operations(apply_filter(image, steps[0]), steps[1:])
+    np.testing.assert_array_equal(PreviewSession(image).render(steps, 0), expected)
+
+
+def test_changing_last_step_reuses_cached_prefix(image, monkeypatch):
+    session = PreviewSession(image)
+    session.render([{'filtro': 'media', 'radio': 2}, {'operacion': 'gamma', 'gamma': 0.5}], 0)
+
+    calls = []
+    original = preview_pipeline.apply_filter
+    monkeypatch.setattr(preview_pipeline, 'apply_filter', lambda *args: calls.append(args) or original(*args))
+    result = session.render([{'filtro': 'media', 'radio': 2}, {'operacion': 'gamma', 'gamma': 2.0}], 0)
+
+    assert calls == []
+    expected = apply_point_operations(apply_filter(image, {'filtro': 'media', 'radio': 2}),
+                                      [{'operacion': 'gamma', 'gamma': 2.0}])
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_filter_output_is_reused_when_intermediate_steps_change(image, monkeypatch):
+    session = PreviewSession(image)
+    calls = []
+    original = preview_pipeline.apply_filter
+    monkeypatch.setattr(preview_pipeline, 'apply_filter', lambda *args: calls.append(args) or original(*args))
+
+    for brillo in (10, 20, 30):
+        steps = [{'filtro': 'mediana', 'radio': 3}, {'operacion': 'brillo_contraste', 'brillo': brillo},
+                 {'operacion': 'gamma', 'gamma': 1.5}]
+        result = session.render(steps, 1)
+
+    assert len(calls) == 1
+    expected = apply_point_operations(apply_filter(session.pyramid[1], scale_step(steps[0], 1)), steps[1:])
+    np.testing.assert_array_equal(result, expected)
+
+
+@pytest.mark.parametrize('step', [
+    {'filtro': 'media', 'radio': float('inf')},
+    {'filtro': 'gaussiano', 'sigma': float('nan')},
+    {'filtro': 'gaussiano', 'sigma': 0},
+    {'filtro': 'mediana', 'radio': 'tres'},
+])
+def test_invalid_spatial_parameters_are_rejected_at_every_level(image, step):
+    session = PreviewSession(image)
+    for level in range(len(session.pyramid)):
+        with pytest.raises(ValueError):
+            session.render([step], level)
+
+
+def test_session_keeps_bounded_prefixes_per_level(image):
+    session = PreviewSession(image)
+    pyramid_bytes = sum(level.nbytes for level in session.pyramid)
+    for radius in range(1, 6):
+        session.render([{'filtro': 'media', 'radio': radius}, {'operacion': 'negativo'}], 0)
+        session.render([{'filtro': 'media', 'radio': radius}, {'operacion': 'negativo'}], 1)
+    assert session.nbytes == pyramid_bytes + session.pyramid[0].nbytes + session.pyramid[1].nbytes
+
+
+def test_register_defers_decoding_until_first_render(tmp_path, image):
+    path = tmp_path / 'carga.png'
+    Image.fromarray(image).save(path)
+    loads = []
+    cache = PreviewCache(storage_dir=str(tmp_path / 'sesiones'),
+                         loader=lambda p: loads.append(p) or load_png(p))
+
+    session_id = cache.register(str(path))
+    assert loads == [] and not path.exists()
+
+    result, level = cache.render(session_id, [{'operacion': 'negativo'}], 0)
+    assert len(loads) == 1 and level == 0
+    np.testing.assert_array_equal(result, 255 - image)
+
+
+def test_cache_evicts_least_recently_used_sessions_by_bytes(tmp_path, image):
+    session_bytes = PreviewSession(image).nbytes
+    cache = PreviewCache(max_bytes=2 * session_bytes, storage_dir=None, loader=load_png)
+    ids = []
+    for index in range(3):
+        path = tmp_path / f'imagen_{index}.png'
+        Image.fromarray(image).save(path)
+        ids.append(cache.register(str(path)))
+
+    assert cache.get(ids[0]) is None
+    assert cache.get(ids[2]) is not None
+    assert cache.nbytes <= 2 * session_bytes
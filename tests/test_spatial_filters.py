@@ -0,0 +1,92 @@
+"""Pruebas del motor de filtros espaciales."""
+
+import numpy as np
+import pytest
+
+import spatial_filters
+from benchmark_filters import create_benchmark_image, reference_hysteresis, reference_mean
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_hysteresis_matches_breadth_first_reference(seed):
+    rng = np.random.default_rng(seed)
+    height, width = rng.integers(1, 48, size=2)
+    magnitude = rng.random((height, width))
+    strong = magnitude > 0.9
+    weak = (magnitude > rng.uniform(0.3, 0.8)) & ~strong
+    np.testing.assert_array_equal(spatial_filters._hysteresis(strong, weak),
+                                  reference_hysteresis(strong, weak))
+
+
+def test_hysteresis_follows_long_serpentine_edge():
+    candidates = np.zeros((64, 64), dtype=bool)
+    candidates[::2, :] = True
+    candidates[1::4, -1] = True
+    candidates[3::4, 0] = True
+    strong = np.zeros_like(candidates)
+    strong[0, 0] = True
+    edges = spatial_filters._hysteresis(strong, candidates & ~strong)
+    np.testing.assert_array_equal(edges, candidates)
+
+
+def test_mean_filter_matches_direct_convolution():
+    image = create_benchmark_image(64)
+    np.testing.assert_array_equal(spatial_filters.mean_filter(image, 3), reference_mean(image, 3))
+
+
+@pytest.mark.parametrize('operation', [
+    {'filtro': 'media', 'radio': spatial_filters.MAX_RADIUS + 1},
+    {'filtro': 'mediana', 'radio': 0},
+    {'filtro': 'wiener', 'radio': float('inf')},
+    {'filtro': 'gaussiano', 'sigma': spatial_filters.MAX_SIGMA * 2},
+    {'filtro': 'canny', 'sigma': float('nan')},
+])
+def test_out_of_range_parameters_raise_value_error(operation):
+    with pytest.raises(ValueError):
+        spatial_filters.apply_filter(np.zeros((8, 8), dtype=np.uint8), operation)
+
+
+def test_radius_is_clamped_to_image_size():
+    image = create_benchmark_image(20)
+    clamped = spatial_filters.mean_filter(image, spatial_filters.MAX_RADIUS)
+    np.testing.assert_array_equal(clamped, spatial_filters.mean_filter(image, 19))
+    assert spatial_filters.gaussian_filter(image, spatial_filters.MAX_SIGMA).shape == image.shape
+
+
+def direct_median(image, radius):
+    """Mediana de referencia con np.median sobre cada ventana rellenada por reflexión."""
+    padded = np.pad(image, radius, mode='reflect')
+    size = 2 * radius + 1
+    windows = np.lib.stride_tricks.sliding_window_view(padded, (size, size))
+    return np.median(windows, axis=(2, 3)).astype(image.dtype)
+
+
+def test_uint16_median_is_chunked_and_matches_reference(monkeypatch):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 65536, size=(40, 30), dtype=np.uint16)
+    # Bloques de una sola fila: la copia de ventanas nunca supera una fila
+    monkeypatch.setattr(spatial_filters, 'MEDIAN_WINDOW_MAX_BYTES', 1)
+    np.testing.assert_array_equal(spatial_filters.median_filter(image, 3), direct_median(image, 3))
+
+
+def test_uint16_median_rejects_large_radius():
+    image = np.zeros((600, 600), dtype=np.uint16)
+    with pytest.raises(ValueError):
+        spatial_filters.apply_filter(image, {'filtro': 'mediana', 'radio': spatial_filters.MAX_RADIUS})
+
+
+def test_median_on_one_pixel_wide_image():
+    image = np.arange(10, dtype=np.uint8).reshape(10, 1)
+    np.testing.assert_array_equal(spatial_filters.median_filter(image, 1), direct_median(image, 1))
+
+
+@pytest.mark.parametrize('radius', [1, 5, 20])
+def test_small_tiles_match_single_tile(monkeypatch, radius):
+    image = create_benchmark_image(97)[:, :61]
+    single = spatial_filters.apply_filter(image, {'filtro': 'wiener', 'radio': radius})
+    # Tiles de pocas filas: el halo de cada uno sale de la imagen o del relleno por reflexión
+    monkeypatch.setattr(spatial_filters, 'MAX_TILE_PIXELS', 61 * 4)
+    monkeypatch.setattr(spatial_filters, 'MIN_TILE_ROWS', 1)
+    assert len(spatial_filters._row_tiles(97, 1, 61, radius)) > 1
+    np.testing.assert_array_equal(spatial_filters.apply_filter(image, {'filtro': 'wiener', 'radio': radius}), single)
+    np.testing.assert_array_equal(spatial_filters.mean_filter(image, radius), reference_mean(image, radius))
@@ -0,0 +1,77 @@
+"""Pruebas del acumulador de estadísticas temporales con histogramas sintéticos (sin OpenCV)."""
+
+import numpy as np
+import pytest
+
+from point_operations import histogram_statistics
+from video_analysis import CHANNEL_NAMES, TemporalStatistics
+
+
+def synthetic_frames(count, seed=0):
+    """Genera los valores de cada canal de `count` frames de tamaños distintos."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for index in range(count):
+        low = rng.integers(0, 128)
+        frames.append(rng.integers(low, 256, size=(len(CHANNEL_NAMES), 50 + 7 * index), dtype=np.uint8))
+    return frames
+
+
+def channel_histograms(values):
+    return np.stack([np.bincount(channel, minlength=256) for channel in values])
+
+
+def test_accumulated_statistics_match_concatenated_frames():
+    frames = synthetic_frames(40)
+    statistics = TemporalStatistics()
+    for index, values in enumerate(frames):
+        statistics.update(index, index / 30, channel_histograms(values))
+
+    concatenated = np.concatenate(frames, axis=1)
+    np.testing.assert_array_equal(statistics.histograms, channel_histograms(concatenated))
+
+    stats = histogram_statistics(statistics.histograms)
+    np.testing.assert_allclose(stats['promedio'], concatenated.mean(axis=1))
+    np.testing.assert_allclose(stats['varianza'], concatenated.var(axis=1))
+    np.testing.assert_array_equal(stats['minimo'], concatenated.min(axis=1))
+    np.testing.assert_array_equal(stats['maximo'], concatenated.max(axis=1))
+    assert statistics.frames_analyzed == 40
+
+
+def test_series_points_match_each_recorded_frame():
+    frames = synthetic_frames(5)
+    statistics = TemporalStatistics()
+    for index, values in enumerate(frames):
+        statistics.update(index, index / 30, channel_histograms(values))
+
+    series = statistics.series()
+    assert series['frame'] == list(range(5))
+    for channel, name in enumerate(CHANNEL_NAMES):
+        expected = [round(float(values[channel].mean()), 2) for values in frames]
+        assert series[name]['promedio'] == expected
+        assert series[name]['minimo'] == [int(values[channel].min()) for values in frames]
+
+
+@pytest.mark.parametrize('max_points', [4, 5, 16])
+def test_series_stays_bounded_with_uniform_stride(max_points):
+    frame_step = 3
+    histograms = channel_histograms(synthetic_frames(1)[0])
+    statistics = TemporalStatistics(max_points=max_points)
+
+    for count in range(1, 40 * max_points + 1):
+        frame_index = (count - 1) * frame_step
+        statistics.update(frame_index, frame_index / 30, histograms)
+        series = statistics.series()
+        assert len(series['frame']) <= max_points
+        assert all(len(values) == len(series['frame'])
+                   for name in CHANNEL_NAMES for values in series[name].values())
+
+    # Tras varias reducciones a la mitad, los puntos siguen equiespaciados desde el primer frame
+    frames = series['frame']
+    assert frames[0] == 0
+    strides = set(np.diff(frames))
+    assert len(strides) == 1
+    stride = strides.pop()
+    assert stride >= 8 * frame_step
+    assert stride % frame_step == 0
+    assert len(frames) >= max_points // 2
@@ -0,0 +1,247 @@
+"""
+Estadísticas Temporales Incrementales de Videos
+
+Un video se recorre frame por frame sin conservar los frames en memoria.
+Por cada frame analizado se calcula el histograma de cada canal RGB y, a
+partir de él, sus estadísticas (el mismo camino vectorizado que usa el
+análisis de imágenes, ver `point_operations.histogram_statistics`).
+
+- Los histogramas de todos los frames se acumulan en un único array de
+  3 x 256 contadores; de él se derivan el promedio, la varianza, el mínimo,
+  el máximo y la moda globales, de modo que la media y la varianza se
+  actualizan de forma incremental y exacta con cada frame.
+- La serie temporal por frame (promedio, desviación estándar, mínimo y
+  máximo de cada canal) se limita a MAX_SERIES_POINTS puntos: al superarse,
+  se descarta un punto de cada dos y a partir de ahí se registra uno de
+  cada dos frames analizados.
+
+La memoria usada es constante para cualquier duración del video.
+OpenCV se importa sólo al abrir el primer video.
+"""
+
+import os
+
+import numpy as np
+
+from point_operations import compute_histogram, histogram_statistics
+
+VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+
+# Nombres de los canales en el orden de los histogramas (RGB)
+CHANNEL_NAMES = ('rojo', 'verde', 'azul')
+
+# Índice de cada canal RGB dentro de un frame BGR de OpenCV
+BGR_CHANNEL_INDEX = (2, 1, 0)
+
+# Cantidad máxima de puntos de la serie temporal
+MAX_SERIES_POINTS = 512
+
+# Paso a partir del cual se salta con CAP_PROP_POS_FRAMES en lugar de avanzar
+# frame a frame: la búsqueda decodifica desde el keyframe anterior, así que
+# sólo conviene cuando el paso supera la distancia entre keyframes (250 es el
+# máximo por defecto de x264)
+SEEK_MIN_FRAME_STEP = 250
+
+
+def _open_capture(video_path):
+    import cv2
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        capture.release()
+        raise ValueError(f"No se pudo abrir el video {os.path.basename(video_path)}")
+    return capture
+
+
+def get_video_metadata(video_path):
+    """
+    Extrae los metadatos del video con las mismas claves que `get_image_metadata`.
+
+    La resolución temporal es la cantidad de frames por segundo.
+
+    Args:
+        video_path: Ruta al archivo de video
+
+    Returns:
+        dict: Metadatos del video
+    """
+    import cv2
+
+    capture = _open_capture(video_path)
+    try:
+        width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        fourcc = int(capture.get(cv2.CAP_PROP_FOURCC))
+    finally:
+        capture.release()
+
+    file_size = os.path.getsize(video_path)
+    duration = total_frames / fps if fps > 0 else 0
+    codec = ''.join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ') or 'desconocido'
+    bits_per_pixel = 24
+
+    return {
+        'formato': os.path.splitext(video_path)[1].lstrip('.').upper(),
+        'ancho': width,
+        'alto': height,
+        'tamaño_disco': file_size,
+        'tamaño_disco_mb': round(file_size / (1024 * 1024), 2),
+        'modo': 'RGB',
+        'canales': 3,
+
+        # Resoluciones y metadatos adicionales
+        'resolucion_radiometrica': bits_per_pixel,
+        'resolucion_espacial_dpi': None,
+        'resolucion_espacial_info': "No aplica (video)",
+        'resolucion_espectral': 3,
+        'resolucion_temporal': f"{fps:.2f} fps ({total_frames} frames, {duration:.2f} s)",
+        'rango_dinamico': f"0 - {(2 ** bits_per_pixel) - 1}",
+        'profundidad_bits': f"{bits_per_pixel} bits por píxel",
+        'tamaño_digital': f"{width} × {height} píxeles",
+
+        # Específicos de video
+        'fps': round(fps, 3),
+        'frames': total_frames,
+        'duracion_s': round(duration, 2),
+        'codec': codec
+    }
+
+
+def iter_video_frames(video_path, frame_step=1, max_frames=None):
+    """
+    Recorre el video devolviendo un frame de cada `frame_step`.
+
+    Con el backend FFmpeg de OpenCV, `grab` también decodifica el frame (sólo
+    se evita la conversión a BGR de `retrieve`), por lo que avanzar frame a
+    frame cuesta decodificar todo el video aunque `frame_step` sea grande.
+    Con pasos de al menos SEEK_MIN_FRAME_STEP frames se salta con
+    CAP_PROP_POS_FRAMES: cada salto decodifica desde el keyframe anterior
+    hasta el frame pedido, es decir, como mucho un GOP por frame analizado.
+    Sólo el frame actual está en memoria.
+
+    Args:
+        video_path: Ruta al archivo de video
+        frame_step: Se analiza un frame de cada `frame_step`
+        max_frames: Cantidad máxima de frames analizados (None = todos)
+
+    Yields:
+        tuple: (índice del frame, tiempo en segundos, frame BGR)
+    """
+    import cv2
+
+    capture = _open_capture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    seek = frame_step >= SEEK_MIN_FRAME_STEP and total_frames > 0
+    analyzed = 0
+    index = 0
+    try:
+        while max_frames is None or analyzed < max_frames:
+            if seek and index > 0:
+                if index >= total_frames or not capture.set(cv2.CAP_PROP_POS_FRAMES, index):
+                    break
+            if not capture.grab():
+                break
+            if seek or index % frame_step == 0:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    break
+                yield index, (index / fps if fps > 0 else 0.0), frame
+                analyzed += 1
+            index += frame_step if seek else 1
+    finally:
+        capture.release()
+
+
+def frame_channel_histograms(frame):
+    """
+    Calcula los histogramas RGB de un frame BGR de 8 bits.
+
+    Returns:
+        np.ndarray: Array (3, 256) con los histogramas de rojo, verde y azul
+    """
+    return np.stack([compute_histogram(frame[:, :, index], 256) for index in BGR_CHANNEL_INDEX])
+
+
+class TemporalStatistics:
+    """
+    Acumulador incremental de estadísticas por canal a lo largo de un video.
+
+    Args:
+        max_points: Cantidad máxima de puntos de la serie temporal
+    """
+
+    def __init__(self, max_points=MAX_SERIES_POINTS):
+        self.max_points = max_points
+        self.histograms = np.zeros((len(CHANNEL_NAMES), 256), dtype=np.int64)
+        self.frames_analyzed = 0
+        self._stride = 1
+        self._series = {'frame': [], 'tiempo_s': []}
+        for name in CHANNEL_NAMES:
+            self._series[name] = {'promedio': [], 'desviacion_estandar': [], 'minimo': [], 'maximo': []}
+
+    def update(self, frame_index, timestamp, histograms):
+        """
+        Incorpora los histogramas (3, 256) de un frame.
+
+        Args:
+            frame_index: Índice del frame en el video
+            timestamp: Tiempo del frame en segundos
+            histograms: Salida de `frame_channel_histograms`
+        """
+        self.histograms += histograms
+        if self.frames_analyzed % self._stride == 0:
+            self._record(frame_index, timestamp, histogram_statistics(histograms))
+        self.frames_analyzed += 1
+
+    def _record(self, frame_index, timestamp, stats):
+        self._series['frame'].append(frame_index)
+        self._series['tiempo_s'].append(round(timestamp, 3))
+        std = np.sqrt(stats['varianza'])
+        for channel, name in enumerate(CHANNEL_NAMES):
+            series = self._series[name]
+            series['promedio'].append(round(float(stats['promedio'][channel]), 2))
+            series['desviacion_estandar'].append(round(float(std[channel]), 2))
+            series['minimo'].append(int(stats['minimo'][channel]))
+            series['maximo'].append(int(stats['maximo'][channel]))
+
+        # Mantener acotada la serie: quedarse con un punto de cada dos
+        if len(self._series['frame']) > self.max_points:
+            self._stride *= 2
+            self._series['frame'] = self._series['frame'][::2]
+            self._series['tiempo_s'] = self._series['tiempo_s'][::2]
+            for name in CHANNEL_NAMES:
+                for key, values in self._series[name].items():
+                    self._series[name][key] = values[::2]
+
+    def series(self):
+        """Serie temporal por frame de las estadísticas de cada canal."""
+        return self._series
+
+
+def analyze_video(video_path, frame_step=1, max_frames=None):
+    """
+    Recorre el video y acumula sus estadísticas por canal.
+
+    Args:
+        video_path: Ruta al archivo de video
+        frame_step: Se analiza un frame de cada `frame_step`
+        max_frames: Cantidad máxima de frames analizados (None = todos)
+
+    Returns:
+        TemporalStatistics: Histogramas acumulados y serie temporal
+    """
+    if frame_step < 1:
+        raise ValueError("El paso de muestreo de frames debe ser mayor o igual a 1")
+    if max_frames is not None and max_frames < 1:
+        raise ValueError("La cantidad máxima de frames debe ser mayor o igual a 1")
+
+    statistics = TemporalStatistics()
+    for frame_index, timestamp, frame in iter_video_frames(video_path, frame_step, max_frames):
+        statistics.update(frame_index, timestamp, frame_channel_histograms(frame))
+
+    if statistics.frames_analyzed == 0:
+        raise ValueError("El video no contiene frames legibles")
+    return statistics
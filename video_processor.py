@@ -13,9 +13,13 @@ Fecha: Septiembre 2025
 import cv2
 import os
 from pathlib import Path
-from ultralytics import YOLO
 import argparse
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from inference_service import InferenceClient, results_to_detections, service_url_from_env
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
 
 # Configuración de rutas por defecto
 DEFAULT_VIDEO_PATH = 'input/test_video.mp4'  # Placeholder para el video de entrada
@@ -42,7 +46,7 @@ def setup_directories() -> None:
     print(f"   - Entrada: input/")
     print(f"   - Salida: {OUTPUT_DIR}/")
 
-def load_yolo_model() -> YOLO:
+def load_yolo_model() -> 'YOLO':
     """
     Carga el modelo YOLOv8n pre-entrenado en COCO.
     
@@ -54,6 +58,8 @@ def load_yolo_model() -> YOLO:
         - El modelo está pre-entrenado en COCO dataset
         - Incluye la clase 'person' con ID=0
     """
+    from ultralytics import YOLO
+
     print("🔄 Cargando modelo YOLOv8n...")
     model = YOLO('yolov8n.pt')  # Descarga automáticamente si no existe
     print("✅ Modelo YOLOv8n cargado exitosamente")
@@ -62,13 +68,13 @@ def load_yolo_model() -> YOLO:
     print(f"   - Clase objetivo: 'person' (ID: {PERSON_CLASS_ID})")
     return model
 
-def extract_person_crops(frame: cv2.Mat, results, frame_number: int) -> int:
+def extract_person_crops(frame: cv2.Mat, detections: List[dict], frame_number: int) -> int:
     """
     Extrae y guarda recortes de todas las personas detectadas en un frame.
     
     Args:
         frame: Frame del video (imagen BGR)
-        results: Resultados de la inferencia YOLOv8
+        detections: Detecciones del frame (formato de `results_to_detections`)
         frame_number: Número del frame actual
         
     Returns:
@@ -77,46 +83,63 @@ def extract_person_crops(frame: cv2.Mat, results, frame_number: int) -> int:
     persons_detected = 0
     
     # Procesar cada detección en el frame
-    for result in results:
-        boxes = result.boxes
-        if boxes is not None:
-            for i, box in enumerate(boxes):
-                # Filtrar solo detecciones de la clase 'person' (ID: 0)
-                class_id = int(box.cls[0])
-                confidence = float(box.conf[0])
+    for i, detection in enumerate(detections):
+        # Filtrar solo detecciones de la clase 'person' (ID: 0)
+        class_id = detection['clase_id']
+        confidence = detection['confianza']
+        
+        if class_id == PERSON_CLASS_ID and confidence > 0.5:  # Umbral de confianza
+            # Obtener coordenadas de la bounding box
+            x1, y1, x2, y2 = map(int, detection['caja'])
+            
+            # Asegurar que las coordenadas estén dentro de los límites del frame
+            h, w = frame.shape[:2]
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(w, x2), min(h, y2)
+            
+            # Recortar la región de la persona
+            person_crop = frame[y1:y2, x1:x2]
+            
+            if person_crop.size > 0:  # Verificar que el recorte no esté vacío
+                # Generar nombre del archivo
+                filename = f"frame_{frame_number:06d}_person_{i+1}_conf_{confidence:.2f}.jpg"
+                filepath = os.path.join(OUTPUT_DIR, filename)
+                
+                # Guardar el recorte
+                cv2.imwrite(filepath, person_crop)
+                persons_detected += 1
                 
-                if class_id == PERSON_CLASS_ID and confidence > 0.5:  # Umbral de confianza
-                    # Obtener coordenadas de la bounding box
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    
-                    # Asegurar que las coordenadas estén dentro de los límites del frame
-                    h, w = frame.shape[:2]
-                    x1, y1 = max(0, x1), max(0, y1)
-                    x2, y2 = min(w, x2), min(h, y2)
-                    
-                    # Recortar la región de la persona
-                    person_crop = frame[y1:y2, x1:x2]
-                    
-                    if person_crop.size > 0:  # Verificar que el recorte no esté vacío
-                        # Generar nombre del archivo
-                        filename = f"frame_{frame_number:06d}_person_{i+1}_conf_{confidence:.2f}.jpg"
-                        filepath = os.path.join(OUTPUT_DIR, filename)
-                        
-                        # Guardar el recorte
-                        cv2.imwrite(filepath, person_crop)
-                        persons_detected += 1
-                        
-                        print(f"   💾 Guardado: {filename} (conf: {confidence:.2f})")
+                print(f"   💾 Guardado: {filename} (conf: {confidence:.2f})")
     
     return persons_detected
 
-def process_video(video_path: str, model: YOLO) -> Tuple[int, int]:
+def detect_frame(frame: cv2.Mat, model: Optional['YOLO'], client: Optional[InferenceClient]) -> List[dict]:
+    """
+    Detecta objetos en un frame con el servicio de inferencia o el modelo local.
+    
+    Args:
+        frame: Frame del video (imagen BGR)
+        model: Modelo YOLOv8 cargado en este proceso (si no se usa el servicio)
+        client: Cliente del servicio de inferencia (o None)
+        
+    Returns:
+        List[dict]: Detecciones del frame
+    """
+    if client is not None:
+        return client.detect_frame(frame)
+    # verbose=False para reducir output del modelo
+    results = model(frame, verbose=False)
+    return results_to_detections(results[0], model.names)
+
+def process_video(video_path: str, model: Optional['YOLO'] = None,
+                  client: Optional[InferenceClient] = None) -> Tuple[int, int]:
     """
     Procesa un video completo y extrae todas las personas detectadas.
     
     Args:
         video_path: Ruta al archivo de video
-        model: Modelo YOLOv8 cargado
+        model: Modelo YOLOv8 cargado (si no se usa el servicio de inferencia)
+        client: Cliente del servicio de inferencia compartido (opcional)
         
     Returns:
         Tuple[int, int]: (total_frames_procesados, total_personas_extraídas)
@@ -156,11 +179,10 @@ def process_video(video_path: str, model: YOLO) -> Tuple[int, int]:
                 print(f"\n🔍 Frame {frame_count}/{total_frames} ({progress:.1f}%)")
             
             # Realizar inferencia con YOLOv8
-            # verbose=False para reducir output del modelo
-            results = model(frame, verbose=False)
+            detections = detect_frame(frame, model, client)
             
             # Extraer y guardar personas detectadas
-            persons_in_frame = extract_person_crops(frame, results, frame_count)
+            persons_in_frame = extract_person_crops(frame, detections, frame_count)
             total_persons += persons_in_frame
             
     except KeyboardInterrupt:
@@ -201,6 +223,13 @@ def main():
         default=DEFAULT_OUTPUT_DIR,
         help=f"Directorio de salida (default: {DEFAULT_OUTPUT_DIR})"
     )
+    parser.add_argument(
+        '--inference-url',
+        type=str,
+        default=service_url_from_env(),
+        help="URL del servicio de inferencia compartido, p. ej. http://127.0.0.1:8765 "
+             "o unix:///tmp/yolo.sock (default: INFERENCE_SERVICE_URL; sin valor carga el modelo localmente)"
+    )
     
     args = parser.parse_args()
     
@@ -219,11 +248,17 @@ def main():
             print(f"   Coloca tu video en la carpeta 'input/' o especifica la ruta con --video")
             return
         
-        # 3. Cargar modelo YOLOv8
-        model = load_yolo_model()
+        # 3. Conectar al servicio de inferencia o cargar modelo YOLOv8
+        model, client = None, None
+        if args.inference_url:
+            client = InferenceClient(args.inference_url)
+            client.health()
+            print(f"🔗 Usando servicio de inferencia en {args.inference_url}")
+        else:
+            model = load_yolo_model()
         
         # 4. Procesar video
-        frames_processed, total_persons = process_video(VIDEO_PATH, model)
+        frames_processed, total_persons = process_video(VIDEO_PATH, model, client)
         
         # 5. Mostrar estadísticas finales
         print("\n" + "=" * 50)